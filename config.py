@@ -1,8 +1,10 @@
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (python-dotenv is only imported if there is one)
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+if os.path.exists(ENV_FILE):
+    from dotenv import load_dotenv
+    load_dotenv(ENV_FILE)
 
 # Database Configuration
 DB_CONFIG = {
@@ -15,13 +17,104 @@ DB_CONFIG = {
 # File Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
-OUTPUT_DIR = os.path.join(BASE_DIR, 'output')
+OUTPUT_DIR = os.getenv('OUTPUT_DIR', os.path.join(BASE_DIR, 'output'))
 CHARTS_DIR = os.path.join(OUTPUT_DIR, 'charts')
 
 # Data Files
-RAW_DATA_FILE = os.path.join(DATA_DIR, 'Superstore.csv')
+# RAW_DATA_FILE: one CSV file, a directory (every *.csv in it) or a glob pattern
+RAW_DATA_FILE = os.getenv('RAW_DATA_FILE', os.path.join(DATA_DIR, 'Superstore.csv'))
 CLEANED_DATA_FILE = os.path.join(OUTPUT_DIR, 'cleaned_superstore.csv')
+CLEANED_STORE_DIR = os.path.join(OUTPUT_DIR, 'cleaned_store')
+RUN_METRICS_FILE = os.path.join(OUTPUT_DIR, 'run_metrics.json')
+QUARANTINE_FILE = os.path.join(OUTPUT_DIR, 'quarantine.csv')
+QUALITY_REPORT_FILE = os.path.join(OUTPUT_DIR, 'quality_report.json')
 
-# Ensure directories exist
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-os.makedirs(CHARTS_DIR, exist_ok=True)
+# Storage Backend (see scripts/backends.py)
+# DB_BACKEND: 'mysql' (server in DB_CONFIG) or 'sqlite' (embedded file at SQLITE_PATH,
+# no server needed). SQLITE_BUSY_TIMEOUT: seconds a connection waits for the write lock
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(OUTPUT_DIR, f"{DB_CONFIG['database']}.sqlite"))
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', '30'))
+
+# Connection Pool Settings (see scripts/database.py)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+# Transient errors (lost connection, deadlock, pool exhausted) are retried
+# DB_RETRIES times, waiting DB_RETRY_BACKOFF * 2^attempt seconds in between
+DB_RETRIES = int(os.getenv('DB_RETRIES', '3'))
+DB_RETRY_BACKOFF = float(os.getenv('DB_RETRY_BACKOFF', '0.5'))
+
+# Cleaning Settings
+# CLEAN_CHUNK_SIZE > 0 streams the raw file in chunks of that many rows (memory: one
+# chunk plus the row hashes and Row IDs seen so far, 8 bytes each per row)
+CLEAN_CHUNK_SIZE = int(os.getenv('CLEAN_CHUNK_SIZE', '0'))
+# The loader reads the typed columnar store; the CSV is an optional export
+EXPORT_CLEANED_CSV = os.getenv('EXPORT_CLEANED_CSV', 'true').lower() in ('1', 'true', 'yes')
+
+# Cleaned Store (see scripts/partitioned_store.py)
+# The cleaned data is partitioned by order month (Year=YYYY/Month=MM/). STORE_COMPRESSION:
+# 'gzip' (compressed column files, zlib level STORE_COMPRESSION_LEVEL) or 'none' (raw,
+# memory-mapped). STORE_WORKERS threads write and read the partitions
+STORE_COMPRESSION = os.getenv('STORE_COMPRESSION', 'gzip')
+STORE_COMPRESSION_LEVEL = int(os.getenv('STORE_COMPRESSION_LEVEL', '1'))
+STORE_WORKERS = int(os.getenv('STORE_WORKERS', str(os.cpu_count() or 1)))
+
+# Multi-file Ingest (RAW_DATA_FILE is a directory or glob)
+# Files are parsed and cleaned by INGEST_WORKERS processes (1 = in-process). Each
+# file's result is cached; files unchanged since the last run (size, mtime, SHA-256
+# in INGEST_MANIFEST_FILE) are not read again
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', str(os.cpu_count() or 1)))
+INGEST_MANIFEST_FILE = os.path.join(OUTPUT_DIR, 'ingest_manifest.json')
+INGEST_CACHE_DIR = os.path.join(OUTPUT_DIR, 'ingest_cache')
+
+# Loader Settings
+# LOAD_MODE: 'batch' (multi-row executemany), 'parallel' (batches over several
+# connections), 'infile' (LOAD DATA LOCAL INFILE) or 'row'
+LOAD_MODE = os.getenv('LOAD_MODE', 'batch')
+LOAD_BATCH_SIZE = int(os.getenv('LOAD_BATCH_SIZE', '5000'))
+# LOAD_MODE=parallel: LOAD_WORKERS connections insert disjoint partitions, split by
+# LOAD_PARTITION 'row_id' (contiguous Row_ID ranges) or 'region_year' (Region x order year)
+LOAD_WORKERS = int(os.getenv('LOAD_WORKERS', '4'))
+LOAD_PARTITION = os.getenv('LOAD_PARTITION', 'row_id')
+# LOAD_STRATEGY: 'full' (drop and reload sales) or 'incremental' (new + changed rows only)
+LOAD_STRATEGY = os.getenv('LOAD_STRATEGY', 'full')
+# Cleaned-store partitions in the table as of its last load; incremental loads skip them
+LOAD_STATE_FILE = os.path.join(OUTPUT_DIR, 'load_state.json')
+
+# Pipeline Settings
+# PIPELINE_MODE: 'sequential' (clean, then load) or 'pipelined' (cleaned chunks are
+# loaded by a loader thread while the next chunk is cleaned; streams with
+# CLEAN_CHUNK_SIZE, or 100000 rows if that is 0). PIPELINE_QUEUE_SIZE caps the
+# cleaned chunks waiting for the loader (backpressure bounds the queued chunks)
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', 'sequential')
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '2'))
+
+# Chart Settings
+# CHART_AGGREGATION: 'rollup' (rollup tables), 'sql' (GROUP BY over sales in MySQL)
+# or 'pandas' (fetch all rows, aggregate locally)
+CHART_AGGREGATION = os.getenv('CHART_AGGREGATION', 'rollup')
+# CHART_WORKERS: processes used to render charts (1 = serial, for debugging)
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', str(min(9, os.cpu_count() or 1))))
+
+# Query Cache
+# Analytics query results cached on disk, keyed on SQL + sales table version
+# (row count, max Row_ID, last load batch); the loader invalidates it on write
+QUERY_CACHE = os.getenv('QUERY_CACHE', 'true').lower() in ('1', 'true', 'yes')
+QUERY_CACHE_DIR = os.getenv('QUERY_CACHE_DIR', os.path.join(OUTPUT_DIR, 'query_cache'))
+QUERY_CACHE_MAX_MB = int(os.getenv('QUERY_CACHE_MAX_MB', '64'))
+
+# Top-N Settings
+# TOPN_MODE: 'exact' (full groupby) or 'approximate' (heavy-hitters sketch, see
+# scripts/heavy_hitters.py) for the top products/states in EDA and pandas charts;
+# TOPN_EPSILON bounds the error of each total to epsilon * total weight
+TOPN_MODE = os.getenv('TOPN_MODE', 'exact')
+TOPN_EPSILON = float(os.getenv('TOPN_EPSILON', '0.001'))
+
+# Instrumentation
+# METRICS_PROFILE: '' (off), 'cprofile' (output/profiles/<stage>.prof) or 'tracemalloc'
+METRICS_PROFILE = os.getenv('METRICS_PROFILE', '')
+
+
+def ensure_dirs():
+    """Create the output directories (called by entry points, not at import)"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(CHARTS_DIR, exist_ok=True)
@@ -1,100 +1,212 @@
 """
 Superstore Data Pipeline & Analytics
-Main orchestration script to run the entire data pipeline
+Main orchestration script: the entire pipeline, or a single stage
+
+    python main.py [run]              # clean, schema, load, charts
+    python main.py clean | load | charts [--force]
+    python main.py verify correlation | charts | rollups | topn | startup | reload [options]
+
+pandas, matplotlib and mysql.connector are imported inside the stages that
+use them, so `--help` and the lighter commands start quickly
+(scripts/verify_startup.py checks the import-time budget).
 """
 
-import os
+from functools import partial
+import importlib
+import argparse
 import sys
-import mysql.connector
-from config import DB_CONFIG
+from config import (DB_CONFIG, DB_BACKEND, SQLITE_PATH, LOAD_STRATEGY, CLEAN_CHUNK_SIZE,
+                    PIPELINE_MODE, ensure_dirs)
+from scripts.stage_runner import run_stages
+from scripts import metrics
 
-def run_pipeline():
-    """Run the complete data pipeline"""
-    
-    print("="*70)
-    print("SUPERSTORE DATA PIPELINE & ANALYTICS")
-    print("="*70)
-    
-    # Step 1: Data Cleaning & Analysis
+# verify subcommand -> module with a main(argv) returning the exit code
+VERIFY_CHECKS = {
+    "correlation": "scripts.verify_correlation",
+    "charts": "scripts.verify_chart_queries",
+    "rollups": "scripts.verify_rollups",
+    "topn": "scripts.verify_topn",
+    "startup": "scripts.verify_startup",
+    "reload": "scripts.verify_reload",
+}
+
+
+def clean_stage():
+    """Step 1: Data Cleaning & Analysis (returns the cleaned DataFrame, or None when streaming)"""
     print("\n[STEP 1/4] Running Data Cleaning & Analysis...")
     print("-" * 70)
-    try:
-        from scripts import cleaning_analysis
-        os.system('python scripts/cleaning_analysis.py')
-        print("Success: Data cleaned and initial analysis complete")
-    except Exception as e:
-        print(f"Error in cleaning_analysis.py: {e}")
-        return False
-    
-    # Step 2: Create Database Schema
-    print("\n[STEP 2/4] Setting up MySQL Database Schema...")
+    from scripts import cleaning_analysis
+    if CLEAN_CHUNK_SIZE > 0:
+        cleaning_analysis.run_streaming(CLEAN_CHUNK_SIZE)
+        cleaned = None
+    else:
+        cleaned = cleaning_analysis.run()
+    print("Success: Data cleaned and initial analysis complete")
+    return cleaned
+
+
+def schema_stage():
+    """Step 2: Create Database Schema (independent of cleaning, runs alongside it)"""
+    print(f"\n[STEP 2/4] Setting up Database Schema ({DB_BACKEND})...")
     print("-" * 70)
-    try:
-        # Connect to MySQL server (without database)
-        db = mysql.connector.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password']
-        )
-        cursor = db.cursor()
-        
-        # Create database if not exists
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-        cursor.close()
-        db.close()
-        
-        # Connect to the database and create table
-        db = mysql.connector.connect(**DB_CONFIG)
-        cursor = db.cursor()
-        
-        # Read and execute schema file
-        with open('schema.sql', 'r') as f:
-            schema_sql = f.read()
-            # Split by semicolon and execute each statement
-            for statement in schema_sql.split(';'):
-                if statement.strip():
+    from scripts import database, query_cache, rollups
+    store = database.backend()
+    # One server-level connection: create the database, then switch to it (MySQL only)
+    with database.connection(pool_size=1, database=None) as db:
+        with db.cursor() as cursor:
+            for statement in store.setup_statements(DB_CONFIG['database']):
+                cursor.execute(statement)
+            
+            # Read schema.sql and execute each statement in the backend's dialect.
+            # Tables are only created here: a full reload empties them in the load
+            # stage, once the cleaned data is ready (a failed clean keeps them intact)
+            with open('schema.sql', 'r') as f:
+                for statement in store.schema_statements(f.read()):
+                    cursor.execute(statement)
+
+            # A sales table kept from before Row_Hash existed: add the column. Its rows
+            # hash as changed, so the next incremental load upserts them once.
+            cursor.execute("SELECT * FROM sales LIMIT 0")
+            cursor.fetchall()
+            if "Row_Hash" not in cursor.column_names:
+                for statement in store.schema_statements(
+                        "ALTER TABLE sales ADD COLUMN Row_Hash BIGINT UNSIGNED"):
                     cursor.execute(statement)
+                print("Added the Row_Hash column to the existing sales table")
         
         db.commit()
-        cursor.close()
-        db.close()
-        print("Success: Database schema created")
-    except Exception as e:
-        print(f"Error setting up database: {e}")
-        return False
-    
-    # Step 3: Load Data to MySQL
+        # Incremental loads only add deltas, so the rollups must start out complete
+        if rollups.backfill(db):
+            query_cache.invalidate()  # cached chart results may come from the empty rollups
+            print("Rollup tables were empty: rebuilt from the existing sales rows")
+    print("Success: Database schema created")
+
+
+def load_stage(schema, clean=None):
+    """Step 3: Load Data to MySQL, straight from the in-memory cleaned data"""
     print("\n[STEP 3/4] Loading Data to MySQL...")
     print("-" * 70)
-    try:
-        os.system('python scripts/load_to_mysql.py')
-        print("Success: Data loaded to MySQL")
-    except Exception as e:
-        print(f"Error in load_to_mysql.py: {e}")
-        return False
-    
-    # Step 4: Generate Visualizations
+    from scripts import load_to_mysql
+    if clean is not None:
+        # The same rows as the cleaned store just written, so its partitions apply
+        load_to_mysql.load(clean[load_to_mysql.DATA_COLUMNS],
+                           partitions=load_to_mysql.store_partitions())
+    else:
+        load_to_mysql.load()
+    print("Success: Data loaded to MySQL")
+
+
+def pipelined_stage(schema):
+    """Steps 1+3 overlapped: each cleaned chunk is loaded while the next one is cleaned"""
+    print("\n[STEP 1+3/4] Cleaning & Loading Data to MySQL (pipelined)...")
+    print("-" * 70)
+    from scripts import pipeline
+    pipeline.run()
+    print("Success: Data cleaned and loaded to MySQL")
+
+
+def charts_stage(load=None, clean=None, force=False):
+    """Step 4: Generate Visualizations"""
     print("\n[STEP 4/4] Generating Analytics & Visualizations...")
     print("-" * 70)
-    try:
-        os.system('python scripts/query_and_visualization.py')
-        print("Success: All visualizations generated")
-    except Exception as e:
-        print(f"Error in query_and_visualization.py: {e}")
-        return False
-    
-    # Pipeline Complete
+    from scripts import load_to_mysql, query_and_visualization
+    # After a full reload the table holds exactly the cleaned rows, so they can be
+    # aggregated in memory; an incremental table also keeps earlier loads: read it
+    df = load_to_mysql.to_table_columns(clean) \
+        if clean is not None and LOAD_STRATEGY == 'full' else None
+    if not query_and_visualization.main(force=force, df=df):
+        raise RuntimeError("one or more charts failed to render")
+    print("Success: All visualizations generated")
+
+
+# stage -> (function, stages it depends on)
+STAGES = {
+    "clean": (clean_stage, []),
+    "schema": (schema_stage, []),
+    "load": (load_stage, ["clean", "schema"]),
+    "charts": (charts_stage, ["clean", "load"]),
+}
+
+# PIPELINE_MODE=pipelined: cleaning and loading run as one overlapped stage
+PIPELINED_STAGES = {
+    "schema": (schema_stage, []),
+    "load": (pipelined_stage, ["schema"]),
+    "charts": (charts_stage, ["load"]),
+}
+PIPELINES = {"sequential": STAGES, "pipelined": PIPELINED_STAGES}
+
+
+def run(title, stages, label="PIPELINE"):
+    """Run a set of stages; prints the outcome and returns True on success"""
+    print("="*70)
+    print(title)
+    print("="*70)
+
+    ok, _ = run_stages(stages)
+    metrics.write_report()
     print("\n" + "="*70)
-    print("PIPELINE COMPLETED SUCCESSFULLY")
+    print(f"{label} COMPLETED SUCCESSFULLY" if ok else f"{label} FAILED")
     print("="*70)
+    return ok
+
+
+def run_pipeline():
+    """Run the complete data pipeline"""
+    if PIPELINE_MODE not in PIPELINES:
+        raise ValueError(f"Unknown PIPELINE_MODE '{PIPELINE_MODE}', expected one of {tuple(PIPELINES)}")
+    if not run("SUPERSTORE DATA PIPELINE & ANALYTICS", PIPELINES[PIPELINE_MODE]):
+        return False
+
     print("\nOutput files:")
-    print(f"  - Cleaned data: output/cleaned_superstore.csv")
+    print(f"  - Cleaned data: output/cleaned_store/ (partitioned by Year/Month), output/cleaned_superstore.csv")
     print(f"  - Charts: output/charts/ (9 visualizations)")
-    print(f"  - Database: MySQL '{DB_CONFIG['database']}' database")
+    if DB_BACKEND == 'sqlite':
+        print(f"  - Database: SQLite file {SQLITE_PATH}")
+    else:
+        print(f"  - Database: MySQL '{DB_CONFIG['database']}' database")
+    print(f"  - Run metrics: output/run_metrics.json")
     print("\n" + "="*70)
-    
     return True
 
+
+def verify(check, argv):
+    """Run one verification script in-process; returns its exit code"""
+    return importlib.import_module(VERIFY_CHECKS[check]).main(argv)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Superstore data pipeline. Without a command the full pipeline runs.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.add_parser("run", help="full pipeline: clean, schema, load, charts (default)")
+    commands.add_parser("clean", help="clean the raw CSV and print the EDA")
+    commands.add_parser("load", help="create the schema and load the cleaned data into MySQL")
+    charts = commands.add_parser("charts", help="render the charts from MySQL")
+    charts.add_argument("--force", action="store_true", help="re-render every chart")
+    check = commands.add_parser("verify", help="run a verification check")
+    check.add_argument("check", choices=list(VERIFY_CHECKS))
+    check.add_argument("args", nargs=argparse.REMAINDER,
+                       help="passed to the check, e.g. --exact (correlation), --rebuild (rollups)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    ensure_dirs()
+    if args.command == "verify":
+        return verify(args.check, args.args)
+    if args.command == "clean":
+        ok = run("SUPERSTORE - CLEAN", {"clean": (clean_stage, [])}, "CLEAN")
+    elif args.command == "load":
+        ok = run("SUPERSTORE - LOAD",
+                 {"schema": (schema_stage, []), "load": (load_stage, ["schema"])}, "LOAD")
+    elif args.command == "charts":
+        ok = run("SUPERSTORE - CHARTS",
+                 {"charts": (partial(charts_stage, force=args.force), [])}, "CHARTS")
+    else:
+        ok = run_pipeline()
+    return 0 if ok else 1
+
+
 if __name__ == "__main__":
-    success = run_pipeline()
-    sys.exit(0 if success else 1)
+    sys.exit(main())
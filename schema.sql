@@ -1,11 +1,12 @@
 -- Superstore Database Schema
 -- Created for Data Pipeline & Analytics Project
 
--- Drop table if exists
-DROP TABLE IF EXISTS sales;
+-- Tables are created only if missing so incremental loads keep existing data.
+-- A full reload (LOAD_STRATEGY=full) drops sales and applies this file again
+-- when the load starts (scripts/load_to_mysql.py reset_tables).
 
 -- Create sales table
-CREATE TABLE sales (
+CREATE TABLE IF NOT EXISTS sales (
     Row_ID INT PRIMARY KEY,
     Order_ID VARCHAR(50) NOT NULL,
     Order_Date DATE NOT NULL,
@@ -27,8 +28,50 @@ CREATE TABLE sales (
     Quantity INT,
     Discount DECIMAL(5, 2),
     Profit DECIMAL(10, 4),
+    Row_Hash BIGINT UNSIGNED,
     INDEX idx_order_date (Order_Date),
     INDEX idx_category (Category),
     INDEX idx_region (Region),
     INDEX idx_customer (Customer_ID)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Load audit / high-water mark table
+CREATE TABLE IF NOT EXISTS load_batches (
+    Batch_ID INT AUTO_INCREMENT PRIMARY KEY,
+    Loaded_At DATETIME NOT NULL,
+    Strategy VARCHAR(20) NOT NULL,
+    Rows_Inserted INT NOT NULL,
+    Rows_Updated INT NOT NULL,
+    Max_Row_ID INT
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Rollup tables, maintained by the loader in the same transaction as sales
+CREATE TABLE IF NOT EXISTS rollup_monthly (
+    Year_Month CHAR(7) NOT NULL,
+    Year INT NOT NULL,
+    Category VARCHAR(50) NOT NULL,
+    Region VARCHAR(50) NOT NULL,
+    Segment VARCHAR(50) NOT NULL,
+    Sales DECIMAL(16, 4) NOT NULL,
+    Profit DECIMAL(16, 4) NOT NULL,
+    Quantity BIGINT NOT NULL,
+    Order_Lines INT NOT NULL,
+    PRIMARY KEY (Year_Month, Category, Region, Segment),
+    INDEX idx_rollup_year (Year)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS rollup_product (
+    Product_Name VARCHAR(255) NOT NULL PRIMARY KEY,
+    Sales DECIMAL(16, 4) NOT NULL,
+    Profit DECIMAL(16, 4) NOT NULL,
+    Quantity BIGINT NOT NULL,
+    Order_Lines INT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+    State VARCHAR(100) NOT NULL PRIMARY KEY,
+    Sales DECIMAL(16, 4) NOT NULL,
+    Profit DECIMAL(16, 4) NOT NULL,
+    Quantity BIGINT NOT NULL,
+    Order_Lines INT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
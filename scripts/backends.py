@@ -0,0 +1,253 @@
+"""
+Storage backends behind scripts/database.py, selected with DB_BACKEND.
+
+- mysql: mysql.connector pools against the server in DB_CONFIG.
+- sqlite: an embedded SQLite file at SQLITE_PATH, opened in-process. WAL
+  journaling lets readers run while a load is writing, and loads insert all
+  their batches in a single transaction.
+
+Each backend also renders the few statements that differ between the two
+dialects: the derived date keys, upserts, database setup and the schema DDL.
+The rest of the code base writes portable SQL with %s placeholders. The
+SQLite cursor translates those placeholders to ?.
+"""
+
+import sqlite3
+import datetime
+import queue
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DB_CONFIG, SQLITE_PATH, SQLITE_BUSY_TIMEOUT
+from scripts import metrics
+
+DB_BACKENDS = ("mysql", "sqlite")
+
+
+class MySQLBackend:
+    name = "mysql"
+    signed_hashes = False  # Row_Hash is BIGINT UNSIGNED
+    commit_per_batch = True  # short transactions keep InnoDB locks and undo small
+    supports_infile = True
+    dates_as_text = False
+    DATE_PARTS = {
+        "Year_Month": "DATE_FORMAT({}, '%Y-%m')",
+        "Year": "YEAR({})",
+    }
+
+    def __init__(self):
+        # Imported here so that SQLite runs (and --help) never load mysql.connector
+        from mysql.connector import errorcode, errors, pooling
+        self.errors = errors
+        self.pooling = pooling
+        self.Error = errors.Error
+        self.transient_errors = {
+            errorcode.CR_CONN_HOST_ERROR,
+            errorcode.CR_SERVER_GONE_ERROR,
+            errorcode.CR_SERVER_LOST,
+            errorcode.ER_CON_COUNT_ERROR,
+            errorcode.ER_LOCK_DEADLOCK,
+            errorcode.ER_LOCK_WAIT_TIMEOUT,
+        }
+
+    def identity(self):
+        return [DB_CONFIG["host"], DB_CONFIG["database"]]
+
+    def is_transient(self, error):
+        return isinstance(error, self.errors.PoolError) or \
+            getattr(error, "errno", None) in self.transient_errors
+
+    def create_pool(self, pool_name, pool_size, **options):
+        """Options override DB_CONFIG keys (database=None connects to the server only)"""
+        config = {key: value for key, value in {**DB_CONFIG, **options}.items() if value is not None}
+        return self.pooling.MySQLConnectionPool(pool_name=pool_name, pool_size=pool_size, **config)
+
+    def pool_key(self, pool_size, **options):
+        config = {key: value for key, value in {**DB_CONFIG, **options}.items() if value is not None}
+        return (pool_size,) + tuple(sorted(config.items()))
+
+    def date_part(self, key, column):
+        return self.DATE_PARTS[key].format(column)
+
+    def upsert(self, keys, replace=(), add=()):
+        """Clause appended to an INSERT: overwrite `replace` columns, add to `add` columns"""
+        updates = [f"{c} = VALUES({c})" for c in replace] + [f"{c} = {c} + VALUES({c})" for c in add]
+        return "ON DUPLICATE KEY UPDATE " + ", ".join(updates)
+
+    def setup_statements(self, database):
+        return [f"CREATE DATABASE IF NOT EXISTS {database}", f"USE {database}"]
+
+    def schema_statements(self, sql):
+        return [statement for statement in sql.split(";") if statement.strip()]
+
+
+class SQLiteCursor:
+    """DB-API cursor over sqlite3 with the mysql.connector conventions used here"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        metrics.add_round_trips()
+        self._cursor.execute(sql.replace("%s", "?"), tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        metrics.add_round_trips()
+        self._cursor.executemany(sql.replace("%s", "?"), rows)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def column_names(self):
+        return [column[0] for column in self._cursor.description or []]
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """One sqlite3 connection; close() rolls back open work and returns it to its pool"""
+
+    def __init__(self, pool):
+        self._pool = pool
+        # Pooled connections move between threads, but only one thread uses each at a time
+        self._connection = sqlite3.connect(pool.path, timeout=SQLITE_BUSY_TIMEOUT,
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # In WAL mode NORMAL skips the fsync per commit: a power loss can drop the
+        # last commits but never corrupts the file
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        # 64 MiB page cache (default 2 MiB) keeps the index pages of a large load in memory
+        self._connection.execute("PRAGMA cache_size=-65536")
+
+    def cursor(self, **options):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.rollback()
+        self._pool.release(self)
+
+
+class SQLitePool:
+    """Idle connections to one database file, opened on demand (no fixed size)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._idle = queue.LifoQueue()
+
+    def get_connection(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return SQLiteConnection(self)
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    signed_hashes = True  # SQLite integers are signed 64-bit
+    commit_per_batch = False  # single writer: one transaction per load, readers still see the last commit
+    supports_infile = False
+    dates_as_text = True  # stored as ISO text anyway; skips the date adapter per value
+    DATE_PARTS = {
+        "Year_Month": "strftime('%Y-%m', {})",
+        "Year": "CAST(strftime('%Y', {}) AS INTEGER)",
+    }
+
+    def __init__(self):
+        self.Error = sqlite3.Error
+        # Dates are stored as ISO text, which sorts and strftime()s like a DATE
+        sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+        sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+
+    def identity(self):
+        return ["sqlite", os.path.abspath(SQLITE_PATH)]
+
+    def is_transient(self, error):
+        # Another connection held the write lock for longer than SQLITE_BUSY_TIMEOUT
+        return isinstance(error, sqlite3.OperationalError) and \
+            ("locked" in str(error) or "busy" in str(error))
+
+    def create_pool(self, pool_name, pool_size, **options):
+        """Options (server, database, LOAD DATA flags) do not apply to a local file"""
+        directory = os.path.dirname(os.path.abspath(SQLITE_PATH))
+        os.makedirs(directory, exist_ok=True)
+        return SQLitePool(SQLITE_PATH)
+
+    def pool_key(self, pool_size, **options):
+        return (SQLITE_PATH,)
+
+    def date_part(self, key, column):
+        return self.DATE_PARTS[key].format(column)
+
+    def upsert(self, keys, replace=(), add=()):
+        updates = [f"{c} = excluded.{c}" for c in replace] + [f"{c} = {c} + excluded.{c}" for c in add]
+        return f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET " + ", ".join(updates)
+
+    def setup_statements(self, database):
+        return []
+
+    def schema_statements(self, sql):
+        """
+        schema.sql rewritten for SQLite: inline INDEX clauses become CREATE
+        INDEX statements, table options are dropped, INT primary keys become
+        rowid aliases and BIGINT UNSIGNED becomes a signed BIGINT.
+        """
+        statements = []
+        for statement in sql.split(";"):
+            if not statement.strip():
+                continue
+            table = re.search(r"CREATE TABLE IF NOT EXISTS (\w+)", statement)
+            indexes = []
+
+            def index(match):
+                indexes.append(f"CREATE INDEX IF NOT EXISTS {match[1]} ON {table[1]} {match[2]}")
+                return ""
+
+            statement = re.sub(r",\s*INDEX (\w+) (\([^)]*\))", index, statement)
+            statement = re.sub(r"\)\s*ENGINE=[^;]*$", ")", statement)
+            statement = statement.replace("INT AUTO_INCREMENT PRIMARY KEY",
+                                          "INTEGER PRIMARY KEY AUTOINCREMENT")
+            statement = statement.replace("INT PRIMARY KEY", "INTEGER PRIMARY KEY")
+            statement = statement.replace("BIGINT UNSIGNED", "BIGINT")
+            statements += [statement] + indexes
+        return statements
+
+
+def create(name):
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown DB_BACKEND '{name}', expected one of {DB_BACKENDS}")
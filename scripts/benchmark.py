@@ -0,0 +1,130 @@
+"""
+Benchmark harness.
+
+Runs the pipeline on synthetic datasets of increasing size (see
+generate_synthetic_data.py) and collects the per-stage metrics each run writes
+to run_metrics.json. Every size runs in its own process with its own OUTPUT_DIR
+and a separate benchmark database, so the regular output/ and database are
+left alone. Results are saved to output/benchmarks/results.json; with
+--save-baseline they also become the baseline later runs are compared with.
+
+    python scripts/benchmark.py                     # 100k, 1m, 10m
+    python scripts/benchmark.py --sizes 100k,1m --save-baseline
+    python scripts/benchmark.py --no-db             # cleaning + pandas aggregation only
+"""
+
+from datetime import datetime
+import subprocess
+import platform
+import argparse
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BASE_DIR, OUTPUT_DIR
+from scripts import generate_synthetic_data, metrics
+from scripts.partitioned_store import read_dataset
+from scripts.chart_queries import compute_aggregates
+from scripts.load_to_mysql import to_table_columns
+
+BENCHMARK_DIR = os.path.join(OUTPUT_DIR, "benchmarks")
+RESULTS_FILE = os.path.join(BENCHMARK_DIR, "results.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+DEFAULT_SIZES = "100k,1m,10m"
+STAGE_FIELDS = ["wall_s", "cpu_s", "peak_rss_mb", "rows_per_sec", "db_round_trips"]
+
+
+def run_size(label, csv_path, use_db, db_name):
+    """Run the pipeline (or just cleaning) on one dataset; returns {stage: metrics}"""
+    output_dir = os.path.join(BENCHMARK_DIR, label)
+    env = dict(os.environ, RAW_DATA_FILE=csv_path, OUTPUT_DIR=output_dir,
+               EXPORT_CLEANED_CSV="false", METRICS_PROFILE="")
+    if use_db:
+        env["DB_NAME"] = db_name
+        env["LOAD_STRATEGY"] = "full"
+        command = [sys.executable, "main.py"]
+    else:
+        command = [sys.executable, os.path.join("scripts", "cleaning_analysis.py")]
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "benchmark.log"), "w") as log:
+        completed = subprocess.run(command, cwd=BASE_DIR, env=env, stdout=log,
+                                   stderr=subprocess.STDOUT)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} failed for {label}, "
+                           f"see {os.path.join(output_dir, 'benchmark.log')}")
+
+    with open(os.path.join(output_dir, "run_metrics.json")) as f:
+        report = json.load(f)
+    stages = {record["name"]: {field: record.get(field) for field in STAGE_FIELDS}
+              for record in report["stages"]}
+
+    if not use_db:
+        # Stand-in for the charts stage: the same aggregates computed in pandas
+        with metrics.stage(f"aggregate.{label}") as record:
+            df = to_table_columns(read_dataset(os.path.join(output_dir, "cleaned_store")))
+            record["rows_in"] = len(df)
+            compute_aggregates(df)
+        stages["aggregate.pandas"] = {field: record.get(field) for field in STAGE_FIELDS}
+    return stages
+
+
+def compare(results, baseline):
+    """Print wall time per stage next to the baseline"""
+    print(f"\n{'size':<6} {'stage':<22} {'wall_s':>9} {'baseline':>9} {'ratio':>7}")
+    for label, result in results["sizes"].items():
+        base_stages = baseline.get("sizes", {}).get(label, {}).get("stages", {})
+        for name, stage in result["stages"].items():
+            base = base_stages.get(name, {}).get("wall_s")
+            ratio = f"{stage['wall_s'] / base:.2f}x" if base else "-"
+            base_text = f"{base:.2f}" if base else "-"
+            print(f"{label:<6} {name:<22} {stage['wall_s']:>9.2f} {base_text:>9} {ratio:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on synthetic data")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated, e.g. 100k,1m")
+    parser.add_argument("--no-db", action="store_true", help="skip the MySQL stages")
+    parser.add_argument("--db-name", default="superstore_bench", help="database used for benchmark loads")
+    parser.add_argument("--regenerate", action="store_true", help="rebuild the synthetic CSVs")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args()
+
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpu_count": os.cpu_count()},
+        "database": not args.no_db,
+        "sizes": {},
+    }
+
+    for label in [size.strip().lower() for size in args.sizes.split(",") if size.strip()]:
+        rows = generate_synthetic_data.parse_size(label)
+        csv_path = generate_synthetic_data.output_path(label)
+        if args.regenerate or not os.path.exists(csv_path):
+            print(f"Generating {rows:,} rows -> {csv_path}")
+            generate_synthetic_data.generate(rows, csv_path)
+
+        print(f"Benchmarking {label}...")
+        stages = run_size(label, csv_path, not args.no_db, args.db_name)
+        results["sizes"][label] = {"rows": rows, "stages": stages}
+        for name, stage in stages.items():
+            print(f"  {name:<22} {stage['wall_s']:>8.2f}s")
+
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {RESULTS_FILE}")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {BASELINE_FILE}")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
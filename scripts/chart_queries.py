@@ -0,0 +1,200 @@
+"""
+Chart aggregate definitions.
+
+Every chart in query_and_visualization.py needs only a small aggregate of the
+sales table. Each aggregate is declared once in CHART_AGGREGATES and can be
+run as a GROUP BY query in the database -- against the rollup tables maintained by
+the loader, or against the raw sales table -- so only the result rows cross
+the wire, or computed in pandas from a full sales DataFrame (fallback).
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.heavy_hitters import HeavyHitters
+from scripts.cube import Cube
+from scripts import database
+
+
+def _year_month(df):
+    """'YYYY-MM' of Order_Date as a categorical; only the distinct months are formatted"""
+    dates = pd.to_datetime(df["Order_Date"])
+    codes, months = pd.factorize(dates.dt.year * 12 + dates.dt.month - 1, sort=True)
+    labels = [f"{int(m) // 12:04d}-{int(m) % 12 + 1:02d}" for m in months]
+    return pd.Series(pd.Categorical.from_codes(codes, labels), index=df.index)
+
+
+# Derived dimensions: pandas computation (the SQL expression comes from the
+# storage backend, see backends.py DATE_PARTS)
+DIMENSIONS = {
+    "Year_Month": _year_month,
+    "Year": lambda df: pd.to_datetime(df["Order_Date"]).dt.year.astype("int64"),
+}
+
+# name -> group column, summed measures, sort column/direction, optional LIMIT,
+# and the rollup table (see rollups.py) that can answer it
+CHART_AGGREGATES = {
+    "monthly_sales": {"group_by": "Year_Month", "measures": ["Sales"],
+                      "order_by": "Year_Month", "ascending": True, "limit": None,
+                      "rollup": "rollup_monthly"},
+    "sales_per_year": {"group_by": "Year", "measures": ["Sales"],
+                       "order_by": "Year", "ascending": True, "limit": None,
+                       "rollup": "rollup_monthly"},
+    "profit_per_category": {"group_by": "Category", "measures": ["Profit"],
+                            "order_by": "Profit", "ascending": True, "limit": None,
+                            "rollup": "rollup_monthly"},
+    "top_products": {"group_by": "Product_Name", "measures": ["Sales"],
+                     "order_by": "Sales", "ascending": False, "limit": 10,
+                     "rollup": "rollup_product"},
+    "sales_by_region": {"group_by": "Region", "measures": ["Sales"],
+                        "order_by": "Sales", "ascending": False, "limit": None,
+                        "rollup": "rollup_monthly"},
+    "sales_by_segment": {"group_by": "Segment", "measures": ["Sales"],
+                         "order_by": "Sales", "ascending": False, "limit": None,
+                         "rollup": "rollup_monthly"},
+    "top_states": {"group_by": "State", "measures": ["Sales"],
+                   "order_by": "Sales", "ascending": False, "limit": 10,
+                   "rollup": "rollup_state"},
+    "category_margin": {"group_by": "Category", "measures": ["Sales", "Profit"],
+                        "order_by": "Category", "ascending": True, "limit": None,
+                        "rollup": "rollup_monthly"},
+}
+
+CORRELATION_COLUMNS = ["Sales", "Profit", "Quantity", "Discount"]
+SKETCH_CHUNK_ROWS = 100_000
+
+
+def build_sql(spec, use_rollup=False):
+    """Render one aggregate spec as a GROUP BY / ORDER BY / LIMIT query"""
+    key = spec["group_by"]
+    if use_rollup:
+        table, key_expr = spec["rollup"], key
+    else:
+        table = "sales"
+        key_expr = database.backend().date_part(key, "Order_Date") if key in DIMENSIONS else key
+    measures = ", ".join(f"SUM({m}) AS {m}" for m in spec["measures"])
+    direction = "ASC" if spec["ascending"] else "DESC"
+    order = f"{spec['order_by']} {direction}"
+    if spec["order_by"] != key:
+        order += f", {key} ASC"  # deterministic ties, same as the pandas path
+    sql = f"SELECT {key_expr} AS {key}, {measures} FROM {table} GROUP BY {key} ORDER BY {order}"
+    if spec["limit"]:
+        sql += f" LIMIT {spec['limit']}"
+    return sql
+
+
+def _normalize(result, spec):
+    """Same column types regardless of which path produced the result"""
+    for measure in spec["measures"]:
+        result[measure] = result[measure].astype("float64")
+    if spec["group_by"] == "Year":
+        result["Year"] = result["Year"].astype("int64")
+    return result.reset_index(drop=True)
+
+
+def query_aggregate(db, name, use_rollup=False):
+    """Run one chart aggregate in the database"""
+    spec = CHART_AGGREGATES[name]
+    with db.cursor() as cursor:
+        cursor.execute(build_sql(spec, use_rollup))
+        result = pd.DataFrame(cursor.fetchall(), columns=[spec["group_by"]] + spec["measures"])
+    return _normalize(result, spec)
+
+
+def _sketch_top(keys, values, spec, epsilon):
+    """Top-N of one measure from a heavy-hitters sketch fed in row chunks"""
+    sketch = HeavyHitters(epsilon)
+    for start in range(0, len(keys), SKETCH_CHUNK_ROWS):
+        sketch.update(keys.iloc[start:start + SKETCH_CHUNK_ROWS],
+                      values.iloc[start:start + SKETCH_CHUNK_ROWS])
+    top = sketch.top(spec["limit"])
+    return pd.DataFrame({spec["group_by"]: top.index, spec["order_by"]: top.to_numpy()})
+
+
+def sales_cube(df):
+    """Cube over a sales DataFrame that also knows the derived dimensions"""
+    return Cube(df, DIMENSIONS)
+
+
+def aggregate_frame(df, name, topn_epsilon=None, cube=None):
+    """
+    Compute one chart aggregate in pandas from a full sales DataFrame.
+
+    Pass a shared cube (sales_cube(df)) so that aggregates grouped by the same
+    dimension reuse its factorized keys. With topn_epsilon, descending top-N
+    aggregates of a single measure come from a heavy-hitters sketch instead
+    (approximate).
+    """
+    spec = CHART_AGGREGATES[name]
+    key = spec["group_by"]
+    cube = cube or sales_cube(df)
+    if (topn_epsilon and spec["limit"] and not spec["ascending"]
+            and spec["measures"] == [spec["order_by"]]):
+        values = pd.to_numeric(df[spec["order_by"]])
+        return _normalize(_sketch_top(cube.keys(key), values, spec, topn_epsilon), spec)
+    result = cube.sum(spec["measures"], by=key).reset_index()
+
+    if spec["order_by"] == key:
+        result = result.sort_values(key, ascending=spec["ascending"], kind="mergesort")
+    else:
+        result = result.sort_values([spec["order_by"], key],
+                                    ascending=[spec["ascending"], True], kind="mergesort")
+    if spec["limit"]:
+        result = result.head(spec["limit"])
+    return _normalize(result, spec)
+
+
+def _correlation_from_sums(n, sums, products):
+    """Pearson correlation matrix from COUNT, SUM(x) and SUM(x*y)"""
+    k = len(CORRELATION_COLUMNS)
+    cov = np.empty((k, k))
+    for i in range(k):
+        for j in range(k):
+            cov[i, j] = products[i][j] - sums[i] * sums[j] / n
+    std = np.sqrt(np.diag(cov))
+    return pd.DataFrame(cov / np.outer(std, std),
+                        index=CORRELATION_COLUMNS, columns=CORRELATION_COLUMNS)
+
+
+def query_correlation(db):
+    """Correlation matrix computed from one row of SQL sums"""
+    cols = CORRELATION_COLUMNS
+    pairs = [(i, j) for i in range(len(cols)) for j in range(i, len(cols))]
+    select = ["COUNT(*)"] + [f"SUM({c})" for c in cols]
+    select += [f"SUM({cols[i]} * {cols[j]})" for i, j in pairs]
+
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(select)} FROM sales")
+        row = cursor.fetchone()
+    if not row[0]:
+        # Empty table: the sums are NULL; NaN like df.corr() on no rows
+        return pd.DataFrame(np.nan, index=cols, columns=cols)
+    row = [float(v) for v in row]
+
+    n, sums = row[0], row[1:1 + len(cols)]
+    products = [[0.0] * len(cols) for _ in cols]
+    for (i, j), value in zip(pairs, row[1 + len(cols):]):
+        products[i][j] = products[j][i] = value
+    return _correlation_from_sums(n, sums, products)
+
+
+def correlation_frame(df):
+    return df[CORRELATION_COLUMNS].apply(pd.to_numeric).corr()
+
+
+def fetch_aggregates(db, use_rollup=False):
+    """All chart inputs from the database (correlation always needs the raw rows)"""
+    aggregates = {name: query_aggregate(db, name, use_rollup) for name in CHART_AGGREGATES}
+    aggregates["correlation"] = query_correlation(db)
+    return aggregates
+
+
+def compute_aggregates(df, topn_epsilon=None):
+    """All chart inputs from a full sales DataFrame (pandas fallback)"""
+    cube = sales_cube(df)
+    aggregates = {name: aggregate_frame(df, name, topn_epsilon, cube) for name in CHART_AGGREGATES}
+    aggregates["correlation"] = correlation_frame(df)
+    return aggregates
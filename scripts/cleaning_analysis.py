@@ -1,69 +1,500 @@
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import glob
 import sys
 import os
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import RAW_DATA_FILE, CLEANED_DATA_FILE
+from config import (RAW_DATA_FILE, CLEANED_DATA_FILE, CLEANED_STORE_DIR,
+                    CLEAN_CHUNK_SIZE, EXPORT_CLEANED_CSV, TOPN_MODE, TOPN_EPSILON,
+                    INGEST_WORKERS, ensure_dirs)
+from scripts.partitioned_store import PartitionedWriter, write_dataset, concat_frames
+from scripts.heavy_hitters import HeavyHitters
+from scripts.cube import Cube
+from scripts import metrics, schema_dtypes, quality_rules, ingest_manifest
+
+# Agregasi EDA: (judul, kolom group, kolom nilai, top-N atau None)
+EDA_AGGREGATES = [
+    ("=== Total Sales per Tahun ===", "Year", "Sales", None),
+    ("=== Top 10 Produk Terlaris (Quantity) ===", "Product Name", "Quantity", 10),
+    ("=== Profit per Kategori ===", "Category", "Profit", None),
+    ("=== Negara dengan Sales Tertinggi ===", "Country", "Sales", 10),
+]
+
+
+# File kode yang menentukan hasil pembersihan per file (cache multi-file direset bila berubah)
+INGEST_SOURCES = ["cleaning_analysis.py", "quality_rules.py", "schema_dtypes.py",
+                  "heavy_hitters.py", "cube.py"]
+
 
 # =============================
 # 1. LOAD DATASET
 # =============================
-df = pd.read_csv(RAW_DATA_FILE, encoding="latin-1")
+def is_multi_file(source=RAW_DATA_FILE):
+    """RAW_DATA_FILE berupa folder atau pola glob"""
+    return os.path.isdir(source) or any(ch in source for ch in "*?[")
+
 
-print("=== 5 Data Teratas ===")
-print(df.head(), "\n")
+def input_files(source=RAW_DATA_FILE):
+    """File mentah, terurut: satu file, semua *.csv dalam folder, atau hasil pola glob"""
+    if os.path.isdir(source):
+        return sorted(glob.glob(os.path.join(source, "*.csv")))
+    if is_multi_file(source):
+        return sorted(path for path in glob.glob(source) if os.path.isfile(path))
+    return [source]
 
-print("=== Info Dataset ===")
-print(df.info(), "\n")
 
-print("=== Jumlah Missing Values ===")
-print(df.isnull().sum(), "\n")
+def load_dataset():
+    """Baca seluruh file mentah sekaligus (kategori & tanggal langsung bertipe)"""
+    return pd.read_csv(RAW_DATA_FILE, encoding="latin-1",
+                       **schema_dtypes.csv_read_options(RAW_DATA_FILE))
 
-print("=== Jumlah Duplikasi ===")
-print(df.duplicated().sum(), "\n")
+
+def profile(df):
+    """Tampilkan ringkasan data mentah"""
+    print("=== 5 Data Teratas ===")
+    print(df.head(), "\n")
+
+    print("=== Info Dataset ===")
+    print(df.info(), "\n")
+
+    print("=== Jumlah Missing Values ===")
+    print(df.isnull().sum(), "\n")
+
+    print("=== Jumlah Duplikasi ===")
+    print(df.duplicated().sum(), "\n")
 
 
 # =============================
 # 2. CLEANING
 # =============================
+def parse_dates(df):
+    """Tanggal sebagai datetime64 (tanggal yang tidak valid menjadi NaT -> dikarantina)"""
+    return df.assign(**{c: pd.to_datetime(df[c], errors="coerce")
+                        for c in ["Order Date", "Ship Date"]})
+
 
-# Hapus duplikasi
-df = df.drop_duplicates()
+def content_hashes(df):
+    """Hash isi per baris untuk deteksi duplikasi antar chunk/file"""
+    # Kolom numerik sebagai float64: chunk yang berisi NaN terbaca float, bukan int
+    numeric = df.select_dtypes("number").columns
+    return pd.util.hash_pandas_object(df.astype(dict.fromkeys(numeric, "float64")),
+                                      index=False).to_numpy()
 
-# Format tanggal
-df["Order Date"] = pd.to_datetime(df["Order Date"])
-df["Ship Date"] = pd.to_datetime(df["Ship Date"])
 
-# Hapus missing values kecil (jika ada)
-df = df.dropna()
+def clean(df, seen_row_ids=None):
+    """
+    Bersihkan data (tanpa drop_duplicates, dilakukan oleh pemanggil).
 
-# Buat kolom baru
-df["Year"] = df["Order Date"].dt.year
-df["Month"] = df["Order Date"].dt.month
-df["Profit Ratio"] = df["Profit"] / df["Sales"]
+    Kembalikan (data bersih, baris karantina beserta alasannya, jumlah
+    pelanggaran per aturan). seen_row_ids: Row ID dari chunk sebelumnya.
+    """
+    # Format tanggal
+    df = parse_dates(df)
+    # File tanpa baris data (hanya header): kolom terbaca object, beri tipe schema
+    if df.empty:
+        df = schema_dtypes.apply(df)
+
+    # Validasi semua aturan sekaligus; baris yang gagal masuk karantina
+    df, quarantined, counts = quality_rules.split(df, seen_row_ids)
+
+    # Tipe kolom sesuai schema.sql (downcast setelah tidak ada NaN)
+    df = schema_dtypes.apply(df)
+
+    # Buat kolom baru (Sales > 0 sudah dijamin aturan, tetap dijaga dari pembagian nol)
+    df["Year"] = df["Order Date"].dt.year
+    df["Month"] = df["Order Date"].dt.month
+    df["Profit Ratio"] = df["Profit"] / df["Sales"].where(df["Sales"] != 0)
+    return df, quarantined, counts
+
+
+def print_quality(report):
+    print("=== Data Quality ===")
+    print(f"{report['rows_quarantined']} dari {report['rows_checked']} baris dikarantina")
+    for name, count in report["rules"].items():
+        if count:
+            print(f"  {name:<32} {count}")
+    print()
 
 
 # =============================
 # 3. EDA (Exploratory)
 # =============================
-print("=== Total Sales per Tahun ===")
-print(df.groupby("Year")["Sales"].sum(), "\n")
+def eda_partials(df):
+    """
+    Jumlah parsial per agregasi EDA (bisa digabung antar chunk).
 
-print("=== Top 10 Produk Terlaris (Quantity) ===")
-print(df.groupby("Product Name")["Quantity"].sum().nlargest(10), "\n")
+    Setiap dimensi di-factorize sekali (Cube), lalu dijumlahkan dengan
+    np.bincount. Dengan TOPN_MODE=approximate, agregasi top-N memakai sketch heavy hitters
+    (memori terbatas, tidak tumbuh dengan jumlah produk).
+    """
+    cube = Cube(df)
+    partials = []
+    for _, by, value, top in EDA_AGGREGATES:
+        if top and TOPN_MODE == "approximate":
+            partials.append(HeavyHitters(TOPN_EPSILON).update(df[by], df[value]))
+        else:
+            partials.append(cube.sum(value, by=by))
+    return partials
 
-print("=== Profit per Kategori ===")
-print(df.groupby("Category")["Profit"].sum(), "\n")
 
-print("=== Negara dengan Sales Tertinggi ===")
-print(df.groupby("Country")["Sales"].sum().nlargest(10), "\n")
+def merge_partials(left, right):
+    """Gabungkan dua daftar jumlah parsial"""
+    if left is None:
+        return right
+    return [a.merge(b) if isinstance(a, HeavyHitters)
+            else pd.concat([a, b]).groupby(level=0, observed=True).sum()
+            for a, b in zip(left, right)]
+
+
+def print_eda(partials):
+    for (title, by, value, top), totals in zip(EDA_AGGREGATES, partials):
+        print(title)
+        if isinstance(totals, HeavyHitters):
+            estimate = totals.top(top)
+            print(estimate.rename_axis(by).rename(value))
+            print(f"(perkiraan, galat maks. {totals.max_error(estimate.index):,.2f}"
+                  f" <= {totals.bound:,.2f})", "\n")
+        else:
+            print(totals.nlargest(top) if top else totals, "\n")
 
 
 # =============================
-# 4. EXPORT DATA BERSIH
+# 4. RUN
 # =============================
-df.to_csv(CLEANED_DATA_FILE, index=False)
+def run():
+    """Mode standar: seluruh file diproses di memori (folder/glob: run_files)"""
+    if is_multi_file():
+        return run_files(input_files())
+
+    with metrics.stage("clean.read") as m:
+        df = load_dataset()
+        m["rows_out"] = len(df)
+    profile(df)
+
+    # Hapus duplikasi, lalu validasi
+    with metrics.stage("clean.transform") as m:
+        m["rows_in"] = len(df)
+        deduplicated = parse_dates(df).drop_duplicates()
+        df, quarantined, counts = clean(deduplicated)
+        m["rows_out"] = len(df)
+    quality_rules.write_quarantine(quarantined)
+    print_quality(quality_rules.write_report(len(deduplicated), counts, len(quarantined)))
+
+    with metrics.stage("clean.eda") as m:
+        m["rows_in"] = len(df)
+        print_eda(eda_partials(df))
+
+    # Export data bersih
+    export(df)
+
+    print("=== DONE! Data bersih berhasil dibuat ===")
+    return df
+
+
+def export(df):
+    """Tulis data bersih ke store berpartisi Year/Month (dan CSV bila diaktifkan)"""
+    with metrics.stage("clean.export") as m:
+        m["rows_out"] = len(df)
+        written, unchanged = write_dataset(df, CLEANED_STORE_DIR)
+        if EXPORT_CLEANED_CSV:
+            df.to_csv(CLEANED_DATA_FILE, index=False)
+    print_store(written, unchanged)
+
+
+def print_store(written, unchanged):
+    print("=== Data Bersih (partisi Year/Month) ===")
+    print(f"{written} partisi ditulis, {unchanged} tidak berubah\n")
+
+
+def in_sorted(values, sorted_values):
+    """Mask: nilai yang sudah ada di sorted_values (pencarian biner, tanpa mengurutkan ulang)"""
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.searchsorted(sorted_values, values).clip(max=len(sorted_values) - 1)
+    return sorted_values[pos] == values
+
+
+def insert_sorted(sorted_values, values):
+    """Sisipkan values yang belum ada ke array terurut; hanya values yang diurutkan"""
+    values = np.sort(values)
+    return np.insert(sorted_values, np.searchsorted(sorted_values, values), values)
+
+
+def run_streaming(chunk_size=CLEAN_CHUNK_SIZE, on_chunk=None):
+    """
+    Mode streaming: baca per chunk, jadi file yang lebih besar dari RAM tetap
+    bisa dibersihkan. Yang tetap disimpan hanya hash baris unik dan Row ID yang
+    diterima (8 byte per baris), untuk mendeteksi duplikasi antar chunk.
+
+    on_chunk(cleaned) dipanggil untuk setiap chunk bersih (mis. diserahkan ke
+    loader pada mode pipelined); exception darinya menghentikan proses.
+    """
+    seen_hashes = np.empty(0, dtype="uint64")  # hash baris yang sudah pernah muncul (terurut)
+    seen_row_ids = np.empty(0, dtype="int64")  # Row ID yang sudah diterima (terurut)
+    missing = None
+    partials = None
+    counts = None
+    total_rows = duplicates = cleaned_rows = quarantined_rows = 0
+    writer = PartitionedWriter(CLEANED_STORE_DIR)
+
+    with metrics.stage("clean.stream") as m:
+        # Beberapa file (folder/glob) dibaca berurutan sebagai satu aliran chunk
+        reader = (chunk for path in input_files()
+                  for chunk in pd.read_csv(path, encoding="latin-1", chunksize=chunk_size,
+                                           **schema_dtypes.csv_read_options(path)))
+        for i, chunk in enumerate(reader):
+            if i == 0:
+                print("=== 5 Data Teratas ===")
+                print(chunk.head(), "\n")
+
+            total_rows += len(chunk)
+            missing = chunk.isnull().sum() if missing is None else missing + chunk.isnull().sum()
+            chunk = parse_dates(chunk)
+
+            # Hapus duplikasi: dalam chunk dan terhadap chunk sebelumnya
+            hashes = content_hashes(chunk)
+            keep = ~pd.Series(hashes).duplicated().to_numpy()
+            keep &= ~in_sorted(hashes, seen_hashes)
+            duplicates += int((~keep).sum())
+            seen_hashes = insert_sorted(seen_hashes, hashes[keep])
+
+            cleaned, quarantined, chunk_counts = clean(chunk[keep], seen_row_ids)
+            seen_row_ids = insert_sorted(seen_row_ids, cleaned["Row ID"].to_numpy(dtype="int64"))
+            cleaned_rows += len(cleaned)
+            quarantined_rows += len(quarantined)
+            counts = chunk_counts if counts is None else counts + chunk_counts
+            quality_rules.write_quarantine(quarantined, append=(i > 0))
+            partials = merge_partials(partials, eda_partials(cleaned))
+
+            writer.append(cleaned)
+            if EXPORT_CLEANED_CSV:
+                cleaned.to_csv(CLEANED_DATA_FILE, index=False,
+                               mode="w" if i == 0 else "a", header=(i == 0))
+            if on_chunk is not None:
+                on_chunk(cleaned)
+        written, unchanged = writer.close()
+        m["rows_in"], m["rows_out"] = total_rows, cleaned_rows
+
+    if partials is None:
+        # Tidak ada chunk sama sekali: tidak ada yang bisa dilaporkan
+        print("=== File mentah tidak berisi data ===\n")
+        print_store(written, unchanged)
+        return
+
+    print("=== Info Dataset ===")
+    print(f"{total_rows} baris mentah, {cleaned_rows} baris bersih "
+          f"(chunk size {chunk_size})\n")
+
+    print("=== Jumlah Missing Values ===")
+    print(missing, "\n")
+
+    print("=== Jumlah Duplikasi ===")
+    print(duplicates, "\n")
+
+    print_quality(quality_rules.write_report(total_rows - duplicates, counts, quarantined_rows))
+
+    print_eda(partials)
+    print_store(written, unchanged)
+
+    print("=== DONE! Data bersih berhasil dibuat ===")
+
+
+# =============================
+# 5. MULTI-FILE (paralel)
+# =============================
+def ingest_settings():
+    """Sidik jari kode dan pengaturan yang memengaruhi hasil per file"""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for path in [os.path.join(directory, name) for name in INGEST_SOURCES] + [schema_dtypes.SCHEMA_FILE]:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return {"code": digest.hexdigest(), "topn_mode": TOPN_MODE, "topn_epsilon": TOPN_EPSILON,
+            "pandas": pd.__version__}
+
+
+def clean_file(path, cache_path, known_hash=None):
+    """
+    Worker (proses terpisah): baca dan bersihkan satu file mentah.
+
+    Hasilnya (data bersih, karantina, hash isi, parsial EDA, statistik)
+    disimpan ke cache_path. Bila isi file sama dengan known_hash (hanya
+    mtime yang berubah), file tidak diproses ulang. Kembalikan
+    (path, hash file, diproses?).
+    """
+    digest = ingest_manifest.file_hash(path)
+    if digest == known_hash:
+        return path, digest, False
+
+    raw = pd.read_csv(path, encoding="latin-1", **schema_dtypes.csv_read_options(path))
+    deduplicated = parse_dates(raw).drop_duplicates()
+    hashes = pd.Series(content_hashes(deduplicated), index=deduplicated.index)
+    df, quarantined, counts = clean(deduplicated)
+    ingest_manifest.save_result(cache_path, {
+        "head": raw.head(),
+        "rows": len(raw),
+        "missing": raw.isnull().sum(),
+        "duplicates": len(raw) - len(deduplicated),
+        "cleaned": df,
+        "quarantined": quarantined,
+        "counts": counts,
+        "hashes": hashes.loc[df.index].to_numpy(),
+        "quarantine_hashes": hashes.loc[quarantined.index].to_numpy(),
+        "partials": eda_partials(df),
+    })
+    return path, digest, True
+
+
+def seen_before(arrays):
+    """Per array: True untuk nilai yang sudah muncul sebelumnya (di array sebelumnya atau lebih awal)"""
+    flags = pd.Series(np.concatenate(arrays)).duplicated().to_numpy()
+    return np.split(flags, np.cumsum([len(array) for array in arrays])[:-1])
+
+
+def run_files(files, workers=INGEST_WORKERS):
+    """
+    Mode multi-file: setiap file dibaca dan dibersihkan oleh proses terpisah.
+
+    File yang tidak berubah sejak run sebelumnya (manifest: ukuran, mtime,
+    SHA-256) tidak dibaca ulang; hasilnya diambil dari cache. Duplikasi antar
+    file dihapus saat penggabungan, dengan urutan nama file (kemunculan
+    pertama menang): baris identik dibuang, Row ID yang sudah dipakai
+    dikarantina. Parsial EDA per file digabung; hanya file yang kehilangan
+    baris dihitung ulang.
+    """
+    if not files:
+        raise FileNotFoundError(f"Tidak ada file CSV untuk {RAW_DATA_FILE}")
+
+    manifest = ingest_manifest.Manifest(ingest_settings())
+    manifest.prune(files)
+    jobs = [(path, manifest.cache_path(path), manifest.known_hash(path))
+            for path in files if not manifest.unchanged(path)]
+    processed = set()
+
+    def record(path, digest, reread):
+        manifest.record(path, digest)
+        if reread:
+            processed.add(path)
+
+    with metrics.stage("clean.ingest") as m:
+        try:
+            if workers > 1 and len(jobs) > 1:
+                with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                    futures = [pool.submit(clean_file, *job) for job in jobs]
+                    for future in futures:
+                        record(*future.result())
+            else:
+                for job in jobs:
+                    record(*clean_file(*job))
+        finally:
+            manifest.save()  # file yang sudah selesai tidak diproses ulang
+        results = [ingest_manifest.load_result(manifest.cache_path(path)) for path in files]
+        m["rows_in"] = sum(result["rows"] for result in results)
+
+    with metrics.stage("clean.merge") as m:
+        # Baris identik dengan file sebelumnya: duplikasi, bukan data bersih/karantina
+        # (duplikasi dalam satu file sudah dibuang oleh worker)
+        flags = seen_before([hashes for result in results
+                             for hashes in (result["hashes"], result["quarantine_hashes"])])
+        repeated_rows, repeated_quarantines = flags[0::2], flags[1::2]
+        # Row ID yang sudah dipakai baris (bersih maupun karantina) di file sebelumnya
+        # melanggar unique_row_id, sama seperti bila semua file dibersihkan sekaligus
+        row_ids = [np.unique(np.concatenate([
+            result["cleaned"]["Row ID"].to_numpy(dtype="int64")[~repeated],
+            result["quarantined"]["Row ID"].to_numpy(dtype="int64")[~repeated_quarantine]]))
+            for result, repeated, repeated_quarantine in zip(results, repeated_rows, repeated_quarantines)]
+        taken_ids = [ids[flags] for ids, flags in zip(row_ids, seen_before(row_ids))]
+
+        frames, quarantines = [], []
+        missing = counts = partials = None
+        total_rows = duplicates = 0
+        for result, repeated, repeated_quarantine, taken_ids in \
+                zip(results, repeated_rows, repeated_quarantines, taken_ids):
+            df, quarantined, file_counts = result["cleaned"], result["quarantined"], result["counts"]
+            if repeated_quarantine.any():
+                reasons = quarantined.loc[repeated_quarantine, "Reasons"].str.split(";").explode()
+                file_counts = file_counts - reasons.value_counts().reindex(file_counts.index, fill_value=0)
+                quarantined = quarantined[~repeated_quarantine]
+
+            # Baris karantina yang Row ID-nya sudah dipakai: tambah alasan unique_row_id
+            # (aturan terakhir, jadi selalu di akhir Reasons; dilewati bila sudah ada
+            # karena duplikat dalam file yang sama)
+            retaken = (quarantined["Row ID"].isin(taken_ids)
+                       & ~quarantined["Reasons"].str.endswith("unique_row_id")).to_numpy()
+            if retaken.any():
+                quarantined = quarantined.copy()
+                quarantined.loc[retaken, "Reasons"] += ";unique_row_id"
+                file_counts = file_counts.copy()
+                file_counts["unique_row_id"] += int(retaken.sum())
+
+            taken = ~repeated & df["Row ID"].isin(taken_ids).to_numpy()
+            if taken.any():
+                columns = quarantined.columns.drop("Reasons")
+                quarantined = pd.concat([quarantined,
+                                         df.loc[taken, columns].assign(Reasons="unique_row_id")]
+                                        ).sort_index(kind="stable")  # urutan baris dalam file
+                file_counts = file_counts.copy()
+                file_counts["unique_row_id"] += int(taken.sum())
+            if repeated.any() or taken.any():
+                df = df[~repeated & ~taken]
+                file_partials = eda_partials(df)  # tanpa baris yang dibuang
+            else:
+                file_partials = result["partials"]
+
+            total_rows += result["rows"]
+            duplicates += result["duplicates"] + int(repeated.sum()) + int(repeated_quarantine.sum())
+            missing = result["missing"] if missing is None else missing.add(result["missing"], fill_value=0)
+            counts = file_counts if counts is None else counts + file_counts
+            partials = merge_partials(partials, file_partials)
+            frames.append(df)
+            quarantines.append(quarantined)
+
+        df = concat_frames(frames)
+        # File tanpa baris karantina tidak ikut digabung (tipe kolom dari file yang berisi)
+        quarantined = pd.concat([q for q in quarantines if len(q)] or quarantines[:1], ignore_index=True)
+        m["rows_in"], m["rows_out"] = total_rows, len(df)
+    quality_rules.write_quarantine(quarantined)
+
+    print("=== 5 Data Teratas ===")
+    print(results[0]["head"], "\n")
+
+    print("=== File Mentah ===")
+    for path, result, frame in zip(files, results, frames):
+        status = "diproses" if path in processed else "tidak berubah (cache)"
+        print(f"  {os.path.basename(path)}: {result['rows']} baris, {len(frame)} bersih - {status}")
+    print(f"{len(processed)} dari {len(files)} file diproses"
+          + (f" ({min(workers, len(jobs))} proses)" if processed else "") + "\n")
+
+    print("=== Info Dataset ===")
+    print(f"{total_rows} baris mentah, {len(df)} baris bersih\n")
+
+    print("=== Jumlah Missing Values ===")
+    print(missing.astype("int64"), "\n")
+
+    print("=== Jumlah Duplikasi ===")
+    print(duplicates, "\n")
+
+    print_quality(quality_rules.write_report(total_rows - duplicates, counts, len(quarantined)))
+
+    with metrics.stage("clean.eda") as m:
+        m["rows_in"] = len(df)
+        print_eda(partials)
+
+    export(df)
+
+    print("=== DONE! Data bersih berhasil dibuat ===")
+    return df
+
 
-print("=== DONE! File cleaned_superstore.csv berhasil dibuat ===")
+if __name__ == "__main__":
+    ensure_dirs()
+    with metrics.stage("clean"):
+        if CLEAN_CHUNK_SIZE > 0:
+            run_streaming(CLEAN_CHUNK_SIZE)
+        else:
+            run()
+    metrics.write_report()
@@ -0,0 +1,229 @@
+"""
+Typed columnar store for the cleaned dataset.
+
+Each column is a raw binary file that can be memory-mapped with NumPy; a small
+manifest.json records the dtype of every column and the row count. String
+columns are dictionary-encoded: int32 codes on disk plus a JSON list of values.
+
+With compression="gzip" the column and dictionary files are gzip streams
+(.gz, readable with zcat) that are decompressed into memory instead of
+memory-mapped. The
+manifest also stores a fingerprint of the contents: rewriting a store with
+the same data leaves the existing files untouched.
+"""
+
+import pandas as pd
+import numpy as np
+import hashlib
+import shutil
+import zlib
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+COMPRESSIONS = (None, "gzip")
+GZIP_WBITS = 31  # zlib window bits for the gzip container
+BLOCK_SIZE = 1 << 20
+SPILL_BYTES = 64 << 20  # appended column data kept in memory before it goes to disk
+
+
+def _column_file(index, name):
+    slug = "".join(ch if ch.isalnum() else "_" for ch in name.lower())
+    return f"{index:02d}_{slug}"
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+class ColumnarWriter:
+    """Append DataFrame chunks to a columnar store; call close() to publish it"""
+
+    def __init__(self, directory, compression=None, level=1):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {COMPRESSIONS}")
+        self.directory = directory
+        self.compression = compression
+        self.level = level
+        self.tmp_directory = directory + ".tmp"
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+        self.columns = None
+        self.dictionaries = {}
+        self.digests = {}  # column name -> SHA-256 of the raw bytes appended so far
+        self.pending = {}  # column name -> raw buffers not yet written
+        self.pending_bytes = 0
+        self.spilled = False
+        self.row_count = 0
+        self.fingerprint = None
+
+    def _describe(self, df):
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                kind, dtype = "datetime", "datetime64[ns]"
+            elif pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                kind, dtype = "numeric", series.dtype.str
+            else:
+                kind, dtype = "string", "int32"
+                self.dictionaries[name] = {}
+            columns.append({"name": name, "kind": kind, "dtype": dtype,
+                            "file": _column_file(i, name) + ".bin"})
+            self.digests[name] = hashlib.sha256()
+            self.pending[name] = []
+        return columns
+
+    def _encode(self, name, series):
+        """Map strings to stable int32 codes shared by every appended chunk (-1 = missing)"""
+        local_codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques, dtype=object)
+        dictionary = self.dictionaries[name]
+        if not dictionary:
+            # First chunk: the local codes already are the store's codes
+            dictionary.update(zip(uniques, range(len(uniques))))
+            mapping = np.arange(len(uniques), dtype="int32")
+        else:
+            mapping = np.array([dictionary.setdefault(value, len(dictionary)) for value in uniques],
+                               dtype="int32")
+        codes = np.full(len(local_codes), -1, dtype="int32")
+        present = local_codes >= 0
+        codes[present] = mapping[local_codes[present]]
+        return codes
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = self._describe(df)
+        for column in self.columns:
+            series = df[column["name"]]
+            if column["kind"] == "string":
+                values = self._encode(column["name"], series)
+            else:
+                values = series.to_numpy(dtype=column["dtype"])
+            values = np.ascontiguousarray(values).view(np.uint8)
+            self.digests[column["name"]].update(values)
+            self.pending[column["name"]].append(values)
+            self.pending_bytes += values.nbytes
+        self.row_count += len(df)
+        if self.pending_bytes > SPILL_BYTES:
+            self._spill()
+
+    def _spill(self):
+        """Move the buffered column data to the raw column files"""
+        os.makedirs(self.tmp_directory, exist_ok=True)
+        for column in self.columns:
+            with open(os.path.join(self.tmp_directory, column["file"]), "ab") as f:
+                for values in self.pending[column["name"]]:
+                    f.write(values)
+            self.pending[column["name"]] = []
+        self.pending_bytes = 0
+        self.spilled = True
+
+    def _write(self, name, buffers, spilled=False):
+        """Write one file of the store (after its spilled raw bytes); returns its file name"""
+        path = os.path.join(self.tmp_directory, name)
+        if self.compression is None:
+            with open(path, "ab") as f:
+                for buffer in buffers:
+                    f.write(buffer)
+            return name
+
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, GZIP_WBITS)
+        with open(path + ".gz", "wb") as dst:
+            if spilled:
+                with open(path, "rb") as src:
+                    for block in iter(lambda: src.read(BLOCK_SIZE), b""):
+                        dst.write(compressor.compress(block))
+                os.remove(path)
+            for buffer in buffers:
+                dst.write(compressor.compress(buffer))
+            dst.write(compressor.flush())
+        return name + ".gz"
+
+    def close(self):
+        """Publish the store; returns False if an identical store was already there"""
+        dictionaries = {}
+        for column in self.columns or []:
+            if column["kind"] == "string":
+                values = json.dumps(list(self.dictionaries[column["name"]]), ensure_ascii=False)
+                dictionaries[column["name"]] = values.encode("utf-8")
+                self.digests[column["name"]].update(dictionaries[column["name"]])
+
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [self.row_count, self.compression] +
+            [[column["name"], column["dtype"], self.digests[column["name"]].hexdigest()]
+             for column in self.columns or []]).encode()).hexdigest()
+        if store_exists(self.directory) and \
+                read_manifest(self.directory).get("fingerprint") == self.fingerprint:
+            shutil.rmtree(self.tmp_directory, ignore_errors=True)
+            return False
+
+        os.makedirs(self.tmp_directory, exist_ok=True)
+        for column in self.columns or []:
+            values_file = column["file"].replace(".bin", ".values.json")
+            column["file"] = self._write(column["file"], self.pending[column["name"]], self.spilled)
+            if column["kind"] == "string":
+                column["values_file"] = self._write(values_file, [dictionaries[column["name"]]])
+
+        manifest = {"row_count": self.row_count, "compression": self.compression,
+                    "fingerprint": self.fingerprint, "columns": self.columns or []}
+        with open(os.path.join(self.tmp_directory, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the finished store in so readers never see a half-written one
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.replace(self.tmp_directory, self.directory)
+        return True
+
+
+def write_store(df, directory, compression=None, level=1):
+    """Write a whole DataFrame as a columnar store (False if it was already up to date)"""
+    writer = ColumnarWriter(directory, compression, level)
+    writer.append(df)
+    return writer.close()
+
+
+def store_exists(directory):
+    return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def read_store(directory, columns=None):
+    """
+    Open a columnar store as a DataFrame.
+
+    Numeric and date columns are memory-mapped (read-only, no parsing), or
+    decompressed when the store is compressed; string columns come back as
+    pandas Categoricals. Only the requested columns are opened.
+    """
+    manifest = read_manifest(directory)
+    compressed = manifest.get("compression") == "gzip"
+    row_count = manifest["row_count"]
+    available = {column["name"]: column for column in manifest["columns"]}
+
+    names = list(available) if columns is None else list(columns)
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise KeyError(f"Columns not in columnar store: {missing}")
+
+    data = {}
+    for name in names:
+        column = available[name]
+        dtype = np.dtype(column["dtype"])
+        path = os.path.join(directory, column["file"])
+        if compressed:
+            with open(path, "rb") as f:
+                values = np.frombuffer(zlib.decompress(f.read(), GZIP_WBITS), dtype=dtype)
+        elif row_count:
+            values = np.memmap(path, dtype=dtype, mode="r", shape=(row_count,))
+        else:
+            values = np.empty(0, dtype=dtype)
+
+        if column["kind"] == "string":
+            with open(os.path.join(directory, column["values_file"]), "rb") as f:
+                values_json = f.read()
+            if compressed:
+                values_json = zlib.decompress(values_json, GZIP_WBITS)
+            categories = json.loads(values_json.decode("utf-8"))
+            values = pd.Categorical.from_codes(values, categories=categories)
+        data[name] = values
+    return pd.DataFrame(data, columns=names, copy=False)
@@ -0,0 +1,106 @@
+"""
+Shared database access for every stage.
+
+DB_BACKEND picks the storage backend (scripts/backends.py): a MySQL server
+reached through DB_CONFIG, or an embedded SQLite file at SQLITE_PATH. Both
+are used through the same interface:
+
+- Connections come from a per-process pool. For MySQL that is a
+  mysql.connector pool of DB_POOL_SIZE connections, which health-checks a
+  connection when it is checked out and reconnects it if the server dropped
+  it.
+- Checkouts and retry()-wrapped work are retried with exponential backoff on
+  transient errors: lost connection, pool exhausted, deadlock, lock wait
+  timeout, or a locked SQLite database.
+- backend() renders the SQL that differs between the dialects.
+
+    with database.connection() as db:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sales")
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DB_BACKEND, DB_POOL_SIZE, DB_RETRIES, DB_RETRY_BACKOFF
+from scripts import backends, metrics
+
+_backend = None
+_backend_lock = threading.Lock()
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def backend():
+    """The configured storage backend, created on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = backends.create(DB_BACKEND)
+        return _backend
+
+
+def identity():
+    """Which database is in use: [host, database] for MySQL, ['sqlite', path] for SQLite"""
+    return backend().identity()
+
+
+def is_transient(error):
+    """Errors worth retrying: the same call may succeed a moment later"""
+    return backend().is_transient(error)
+
+
+def retry(function, *args, retries=DB_RETRIES, backoff=DB_RETRY_BACKOFF, **kwargs):
+    """Call function, retrying transient database errors up to `retries` times"""
+    for attempt in range(retries + 1):
+        try:
+            return function(*args, **kwargs)
+        except backend().Error as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            delay = backoff * 2 ** attempt
+            print(f"Transient database error ({e}), retrying in {delay:.1f}s "
+                  f"[{attempt + 1}/{retries}]")
+            time.sleep(delay)
+
+
+def get_pool(pool_size=DB_POOL_SIZE, label="default", **options):
+    """
+    The pool for the configured database plus options, created on first use.
+
+    MySQL options override DB_CONFIG keys (database=None connects to the
+    server only); each distinct set of options has its own pool. SQLite has
+    one pool per file and ignores the options. A separate label gives a
+    caller its own pool, never shared with connections checked out elsewhere.
+    """
+    store = backend()
+    key = (label,) + store.pool_key(pool_size, **options)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = retry(store.create_pool, f"superstore_{len(_pools)}", pool_size, **options)
+        return _pools[key]
+
+
+@contextmanager
+def connection(pool_size=DB_POOL_SIZE, label="default", **options):
+    """
+    Check out a pooled connection; it goes back to the pool on exit.
+
+    Uncommitted work is rolled back if the block raises.
+    """
+    db = retry(get_pool(pool_size, label, **options).get_connection)
+    metrics.track_db(db)
+    try:
+        yield db
+    except Exception:
+        try:
+            db.rollback()
+        except backend().Error:
+            pass  # connection already gone; the original error matters
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,207 @@
+"""
+Synthetic Superstore data generator.
+
+Writes a CSV with the same columns and formats as data/Superstore.csv at any
+row count, for benchmarking. Values are bootstrapped from the real dataset so
+distributions stay realistic: locations, product categories, discount/sales/
+profit combinations, seasonality and lines per order. Customer and product
+cardinality grow sub-linearly with the row count, as in a real store.
+A share of exact duplicate rows and of missing values is mixed in so the
+cleaning stage has work to do.
+
+    python scripts/generate_synthetic_data.py 1m
+    python scripts/generate_synthetic_data.py 10m --duplicates 0.01 --nulls 0.005
+"""
+
+import argparse
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR, RAW_DATA_FILE
+
+SYNTHETIC_DIR = os.path.join(DATA_DIR, "synthetic")
+SEED_ROWS = 9994  # size of the original dataset the cardinalities are scaled from
+
+# Columns that may be blanked out (nullable in schema.sql)
+NULLABLE_COLUMNS = ["Ship Mode", "Customer Name", "Segment", "City", "State",
+                    "Postal Code", "Region", "Category", "Sub-Category",
+                    "Product Name", "Sales", "Quantity", "Discount", "Profit"]
+
+SHIP_DAYS = {"Same Day": (0, 1), "First Class": (1, 4),
+             "Second Class": (1, 5), "Standard Class": (3, 7)}
+
+
+def parse_size(text):
+    """'100k' / '1m' / '2500' -> row count"""
+    text = text.strip().lower()
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * factor)
+
+
+def output_path(size_label):
+    return os.path.join(SYNTHETIC_DIR, f"superstore_{size_label}.csv")
+
+
+class SeedPools:
+    """Value pools taken from the real dataset and scaled to the target size"""
+
+    def __init__(self, seed_df, n_rows, rng):
+        scale = n_rows / SEED_ROWS
+        seed_df = seed_df.dropna()
+        order_dates = pd.to_datetime(seed_df["Order Date"])
+
+        self.locations = seed_df[["Country", "City", "State", "Postal Code", "Region"]] \
+            .drop_duplicates().reset_index(drop=True)
+        self.measures = seed_df[["Sales", "Quantity", "Discount", "Profit"]].reset_index(drop=True)
+        self.month_weights = order_dates.dt.month.value_counts(normalize=True).sort_index().to_numpy()
+        self.years = np.arange(order_dates.dt.year.min(), order_dates.dt.year.max() + 1)
+        self.ship_modes = seed_df["Ship Mode"].value_counts(normalize=True)
+        self.lines_per_order = seed_df.groupby("Order ID").size().value_counts(normalize=True)
+
+        # Products: the real catalog plus numbered variants of it
+        catalog = seed_df[["Product ID", "Category", "Sub-Category", "Product Name"]] \
+            .drop_duplicates("Product ID").reset_index(drop=True)
+        n_products = max(len(catalog), int(len(catalog) * scale ** 0.5))
+        base = np.arange(n_products) % len(catalog)
+        variant = np.arange(n_products) // len(catalog)
+        products = catalog.iloc[base].reset_index(drop=True)
+        suffix = pd.Series(variant).map(lambda v: "" if v == 0 else f"-V{v}")
+        products["Product ID"] = products["Product ID"] + suffix
+        products["Product Name"] = products["Product Name"] + suffix.str.replace("-V", " v", regex=False)
+        self.products = products
+
+        # Customers: real names recombined, IDs in the original XX-nnnnn format
+        names = seed_df["Customer Name"].drop_duplicates().str.split(" ", n=1, expand=True).dropna()
+        n_customers = max(names.shape[0], int(names.shape[0] * scale ** 0.75))
+        first = names[0].to_numpy()[rng.integers(0, len(names), n_customers)]
+        last = names[1].to_numpy()[rng.integers(0, len(names), n_customers)]
+        segments = seed_df["Segment"].value_counts(normalize=True)
+        self.customers = pd.DataFrame({
+            "Customer ID": [f"{f[0]}{l[0]}-{10000 + i}" for i, (f, l) in enumerate(zip(first, last))],
+            "Customer Name": [f"{f} {l}" for f, l in zip(first, last)],
+            "Segment": rng.choice(segments.index.to_numpy(), n_customers, p=segments.to_numpy()),
+        })
+
+
+def _format_dates(dates):
+    """M/D/YYYY without zero padding, like the source file"""
+    return (dates.dt.month.astype(str) + "/" + dates.dt.day.astype(str)
+            + "/" + dates.dt.year.astype(str))
+
+
+def generate_chunk(pools, n_orders, first_order, first_row_id, rng):
+    """Generate the lines of n_orders orders as a DataFrame"""
+    lines = rng.choice(pools.lines_per_order.index.to_numpy(), n_orders,
+                       p=pools.lines_per_order.to_numpy())
+    n_rows = int(lines.sum())
+
+    # Order-level attributes, repeated for every line of the order
+    years = rng.choice(pools.years, n_orders)
+    months = rng.choice(np.arange(1, 13), n_orders, p=pools.month_weights)
+    days = (rng.random(n_orders) * pd.Series(pd.to_datetime(
+        {"year": years, "month": months, "day": 1})).dt.days_in_month).astype(int) + 1
+    order_dates = pd.to_datetime({"year": years, "month": months, "day": days})
+    ship_modes = rng.choice(pools.ship_modes.index.to_numpy(), n_orders, p=pools.ship_modes.to_numpy())
+    low = pd.Series(ship_modes).map(lambda m: SHIP_DAYS[m][0]).to_numpy()
+    high = pd.Series(ship_modes).map(lambda m: SHIP_DAYS[m][1]).to_numpy()
+    ship_dates = order_dates + pd.to_timedelta(rng.integers(low, high + 1), unit="D")
+    order_ids = (pd.Series(["CA-", "US-"]).to_numpy()[rng.integers(0, 2, n_orders)]
+                 + years.astype(str) + "-" + (100000 + first_order + np.arange(n_orders)).astype(str))
+
+    customer = pools.customers.iloc[rng.integers(0, len(pools.customers), n_orders)]
+    location = pools.locations.iloc[rng.integers(0, len(pools.locations), n_orders)]
+    per_line = np.repeat(np.arange(n_orders), lines)
+
+    product = pools.products.iloc[rng.integers(0, len(pools.products), n_rows)]
+    measures = pools.measures.iloc[rng.integers(0, len(pools.measures), n_rows)]
+
+    chunk = pd.DataFrame({
+        "Row ID": first_row_id + np.arange(n_rows),
+        "Order ID": order_ids[per_line],
+        "Order Date": _format_dates(order_dates).to_numpy()[per_line],
+        "Ship Date": _format_dates(ship_dates).to_numpy()[per_line],
+        "Ship Mode": ship_modes[per_line],
+        "Customer ID": customer["Customer ID"].to_numpy()[per_line],
+        "Customer Name": customer["Customer Name"].to_numpy()[per_line],
+        "Segment": customer["Segment"].to_numpy()[per_line],
+        "Country": location["Country"].to_numpy()[per_line],
+        "City": location["City"].to_numpy()[per_line],
+        "State": location["State"].to_numpy()[per_line],
+        "Postal Code": location["Postal Code"].to_numpy()[per_line],
+        "Region": location["Region"].to_numpy()[per_line],
+        "Product ID": product["Product ID"].to_numpy(),
+        "Category": product["Category"].to_numpy(),
+        "Sub-Category": product["Sub-Category"].to_numpy(),
+        "Product Name": product["Product Name"].to_numpy(),
+        "Sales": measures["Sales"].to_numpy(),
+        "Quantity": measures["Quantity"].to_numpy(),
+        "Discount": measures["Discount"].to_numpy(),
+        "Profit": measures["Profit"].to_numpy(),
+    })
+    return chunk
+
+
+def add_noise(chunk, duplicate_share, null_share, rng):
+    """Blank out random cells and append exact copies of random rows"""
+    n_nulls = int(len(chunk) * null_share)
+    if n_nulls:
+        rows = rng.choice(len(chunk), n_nulls, replace=False)
+        columns = rng.choice(NULLABLE_COLUMNS, n_nulls)
+        for column in NULLABLE_COLUMNS:
+            target = rows[columns == column]
+            chunk[column] = chunk[column].astype(object)
+            chunk.loc[target, column] = np.nan
+
+    n_duplicates = int(len(chunk) * duplicate_share)
+    if n_duplicates:
+        copies = chunk.iloc[rng.choice(len(chunk), n_duplicates, replace=False)]
+        chunk = pd.concat([chunk, copies]).iloc[rng.permutation(len(chunk) + n_duplicates)]
+    return chunk
+
+
+def generate(n_rows, path, duplicate_share=0.01, null_share=0.005, seed=42,
+             chunk_rows=500_000, seed_file=RAW_DATA_FILE):
+    """Write about n_rows rows (incl. duplicates) to path; returns the row count written"""
+    rng = np.random.default_rng(seed)
+    seed_df = pd.read_csv(seed_file, encoding="latin-1")
+    pools = SeedPools(seed_df, n_rows, rng)
+    mean_lines = float((pools.lines_per_order.index * pools.lines_per_order).sum())
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    written, unique_rows, orders = 0, 0, 0
+    target_unique = int(n_rows / (1 + duplicate_share))
+    with open(tmp_path, "w", encoding="latin-1", newline="") as f:
+        while unique_rows < target_unique:
+            remaining = target_unique - unique_rows
+            n_orders = max(1, int(min(chunk_rows, remaining) / mean_lines))
+            chunk = generate_chunk(pools, n_orders, orders, unique_rows + 1, rng)
+            chunk = chunk.iloc[:remaining]
+            orders += n_orders
+            unique_rows += len(chunk)
+            chunk = add_noise(chunk, duplicate_share, null_share, rng)
+            chunk.to_csv(f, index=False, header=written == 0)
+            written += len(chunk)
+    os.replace(tmp_path, path)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic Superstore CSV")
+    parser.add_argument("size", help="row count, e.g. 100k, 1m, 10m")
+    parser.add_argument("--output", help="CSV path (default data/synthetic/superstore_<size>.csv)")
+    parser.add_argument("--duplicates", type=float, default=0.01, help="share of duplicate rows")
+    parser.add_argument("--nulls", type=float, default=0.005, help="share of rows with a missing value")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    path = args.output or output_path(args.size.lower())
+    rows = generate(parse_size(args.size), path, args.duplicates, args.nulls, args.seed)
+    print(f"Wrote {rows:,} rows to {path}")
+
+
+if __name__ == "__main__":
+    main()
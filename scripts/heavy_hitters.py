@@ -0,0 +1,72 @@
+"""
+Approximate top-N by summed weight (e.g. Sales per product).
+
+HeavyHitters is a weighted, mergeable Space-Saving summary with at most
+k = ceil(1 / epsilon) counters. Each update pre-aggregates a chunk and merges
+it into the summary: an item missing from one side is assumed to have that
+side's `floor` (the largest total an untracked item can have), the totals
+are added, and only the k largest are kept.
+
+Every counter is an upper bound of the item's true total and carries its own
+error: true total >= count - error. Items tracked since their first
+appearance are exact (error 0). All errors are <= floor <= epsilon * total
+weight, so every item heavier than that is guaranteed to be tracked.
+Summaries of different chunks or partitions merge with the same guarantee.
+Weights must be non-negative.
+"""
+
+import pandas as pd
+import math
+
+
+class HeavyHitters:
+
+    def __init__(self, epsilon=0.001):
+        self.epsilon = epsilon
+        self.capacity = math.ceil(1 / epsilon)
+        self.counts = pd.Series(dtype="float64")
+        self.errors = pd.Series(dtype="float64")
+        self.floor = 0.0  # upper bound of any untracked item's total
+        self.total = 0.0  # total weight seen
+
+    def _absorb(self, counts, errors, floor, total):
+        index = self.counts.index.union(counts.index)
+        combined = (self.counts.reindex(index, fill_value=self.floor)
+                    + counts.reindex(index, fill_value=floor))
+        combined_errors = (self.errors.reindex(index, fill_value=self.floor)
+                           + errors.reindex(index, fill_value=floor))
+        self.floor += floor
+        if len(combined) > self.capacity:
+            combined = combined.nlargest(self.capacity)
+            combined_errors = combined_errors[combined.index]
+            self.floor = float(combined.min())
+        self.counts, self.errors = combined, combined_errors
+        self.total += total
+
+    def update(self, keys, weights):
+        """Add one chunk: keys and non-negative weights of equal length"""
+        partial = pd.Series(weights.to_numpy(dtype="float64"), index=keys.index) \
+            .groupby(keys, observed=True, sort=False).sum()
+        partial.index = partial.index.astype(object)
+        self._absorb(partial, pd.Series(0.0, index=partial.index), 0.0, float(partial.sum()))
+        return self
+
+    def merge(self, other):
+        """Fold another summary (e.g. from another partition) into this one"""
+        self._absorb(other.counts, other.errors, other.floor, other.total)
+        return self
+
+    @property
+    def bound(self):
+        """Guaranteed error bound epsilon * total weight"""
+        return self.epsilon * self.total
+
+    def top(self, n):
+        """The n heaviest items, ties broken by key like the exact path"""
+        frame = self.counts.rename("total").rename_axis("key").reset_index()
+        frame = frame.sort_values(["total", "key"], ascending=[False, True], kind="mergesort")
+        return pd.Series(frame["total"].to_numpy()[:n], index=frame["key"].to_numpy()[:n])
+
+    def max_error(self, items):
+        """Largest overestimate possible for the given tracked items"""
+        return float(self.errors[list(items)].max()) if len(items) else 0.0
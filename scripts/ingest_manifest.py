@@ -0,0 +1,120 @@
+"""
+Per-file manifest for multi-file ingest.
+
+The manifest records the size, mtime and SHA-256 of every raw input file.
+Each file's cleaning result is cached as a pickle in INGEST_CACHE_DIR. On
+the next run:
+
+- A file whose size and mtime are unchanged is skipped without reading it.
+- A file that was only touched (same hash) is skipped too. It is hashed, but
+  not parsed.
+- New and changed files are cleaned again.
+- Files that disappeared are dropped from the manifest, and their cached
+  results are deleted.
+
+The manifest also stores a fingerprint of the cleaning settings. When that
+fingerprint changes, every cached result is discarded.
+"""
+
+import hashlib
+import pickle
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import INGEST_MANIFEST_FILE, INGEST_CACHE_DIR
+
+HASH_BLOCK = 1 << 20
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in 1 MiB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def save_result(path, result):
+    """Pickle one file's cleaning result (written to a temp file, then renamed)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_result(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class Manifest:
+
+    def __init__(self, settings, path=INGEST_MANIFEST_FILE, cache_dir=INGEST_CACHE_DIR):
+        """settings: JSON-serializable fingerprint of everything that affects a result"""
+        self.path = path
+        self.cache_dir = cache_dir
+        self.settings = settings
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        self.files = stored.get("files", {})
+        if stored.get("settings") != settings:
+            self.prune([])  # results produced with other settings are stale
+
+    def cache_path(self, path):
+        """Where the cleaning result of one input file is cached"""
+        key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _entry(self, path):
+        entry = self.files.get(os.path.abspath(path))
+        if entry is None or not os.path.exists(self.cache_path(path)):
+            return None
+        return entry
+
+    def unchanged(self, path):
+        """Same size and mtime as when the cached result was produced"""
+        entry = self._entry(path)
+        if entry is None:
+            return False
+        stat = file_stat(path)
+        return entry["size"] == stat["size"] and entry["mtime_ns"] == stat["mtime_ns"]
+
+    def known_hash(self, path):
+        """Content hash of the cached result, or None if there is none"""
+        entry = self._entry(path)
+        return entry["sha256"] if entry else None
+
+    def record(self, path, sha256, **info):
+        self.files[os.path.abspath(path)] = {**file_stat(path), "sha256": sha256, **info}
+
+    def get(self, path):
+        return self.files[os.path.abspath(path)]
+
+    def prune(self, paths):
+        """Forget files that are no longer part of the input (and their cached results)"""
+        keep = {os.path.abspath(path) for path in paths}
+        for path in [path for path in self.files if path not in keep]:
+            del self.files[path]
+            try:
+                os.remove(self.cache_path(path))
+            except FileNotFoundError:
+                pass
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"settings": self.settings, "files": self.files}, f, indent=2)
+        os.replace(tmp, self.path)
@@ -1,59 +1,545 @@
 import pandas as pd
-import mysql.connector
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import json
+import time
 import sys
 import os
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import DB_CONFIG, CLEANED_DATA_FILE
+from config import (CLEANED_DATA_FILE, CLEANED_STORE_DIR, LOAD_MODE, LOAD_BATCH_SIZE,
+                    LOAD_STRATEGY, LOAD_WORKERS, LOAD_PARTITION, LOAD_STATE_FILE, ensure_dirs)
+from scripts import partitioned_store
+from scripts import rollups, metrics, database, schema_dtypes, query_cache
 
-df = pd.read_csv(CLEANED_DATA_FILE)
+# CSV column -> sales table column, in INSERT order
+COLUMN_MAP = [
+    ("Row ID", "Row_ID"),
+    ("Order ID", "Order_ID"),
+    ("Order Date", "Order_Date"),
+    ("Ship Date", "Ship_Date"),
+    ("Ship Mode", "Ship_Mode"),
+    ("Customer ID", "Customer_ID"),
+    ("Customer Name", "Customer_Name"),
+    ("Segment", "Segment"),
+    ("Country", "Country"),
+    ("City", "City"),
+    ("State", "State"),
+    ("Postal Code", "Postal_Code"),
+    ("Region", "Region"),
+    ("Product ID", "Product_ID"),
+    ("Category", "Category"),
+    ("Sub-Category", "Sub_Category"),
+    ("Product Name", "Product_Name"),
+    ("Sales", "Sales"),
+    ("Quantity", "Quantity"),
+    ("Discount", "Discount"),
+    ("Profit", "Profit"),
+    ("Row Hash", "Row_Hash"),
+]
+SOURCE_COLUMNS = [source for source, _ in COLUMN_MAP]
+TABLE_COLUMNS = [column for _, column in COLUMN_MAP]
+DATA_COLUMNS = SOURCE_COLUMNS[:-1]
+DATE_COLUMNS = ["Order Date", "Ship Date"]
 
-db = mysql.connector.connect(**DB_CONFIG)
-
-cursor = db.cursor()
+LOAD_MODES = ("row", "batch", "parallel", "infile")
+LOAD_PARTITIONS = ("row_id", "region_year")
+LOAD_STRATEGIES = ("full", "incremental")
 
 insert_query = """
 INSERT INTO sales (
     Row_ID, Order_ID, Order_Date, Ship_Date, Ship_Mode,
     Customer_ID, Customer_Name, Segment, Country, City,
     State, Postal_Code, Region, Product_ID, Category,
-    Sub_Category, Product_Name, Sales, Quantity, Discount, Profit
+    Sub_Category, Product_Name, Sales, Quantity, Discount, Profit,
+    Row_Hash
 )
 VALUES (%s, %s, %s, %s, %s,
         %s, %s, %s, %s, %s,
         %s, %s, %s, %s, %s,
-        %s, %s, %s, %s, %s, %s)
+        %s, %s, %s, %s, %s, %s,
+        %s)
 """
 
-for _, row in df.iterrows():
-    data = (
-        row["Row ID"],
-        row["Order ID"],
-        row["Order Date"],
-        row["Ship Date"],
-        row["Ship Mode"],
-        row["Customer ID"],
-        row["Customer Name"],
-        row["Segment"],
-        row["Country"],
-        row["City"],
-        row["State"],
-        row["Postal Code"],
-        row["Region"],
-        row["Product ID"],
-        row["Category"],
-        row["Sub-Category"],
-        row["Product Name"],
-        row["Sales"],
-        row["Quantity"],
-        row["Discount"],
-        row["Profit"]
-    )
-    cursor.execute(insert_query, data)
-
-db.commit()
-print(f"Success: Uploaded {len(df)} rows to MySQL database")
-
-cursor.close()
-db.close()
+
+def upsert_query():
+    """Same INSERT, but rows whose Row_ID already exists are overwritten in place"""
+    return insert_query + database.backend().upsert(["Row_ID"], replace=TABLE_COLUMNS[1:])
+
+
+def row_hashes(df):
+    """64-bit content hash per row, stable across dtype changes of the same values"""
+    frame = {}
+    for column in DATA_COLUMNS:
+        series = df[column]
+        if column in DATE_COLUMNS:
+            series = pd.to_datetime(series)
+        elif pd.api.types.is_integer_dtype(series):
+            series = series.astype("int64")
+        elif pd.api.types.is_float_dtype(series):
+            series = series.astype("float64")
+            scale = schema_dtypes.scale_of(column)
+            if scale is not None:
+                # Round to the DECIMAL scale, as the table stores the value
+                series = series.round(scale)
+        else:
+            series = series.astype(object)
+        frame[column] = series
+    return pd.util.hash_pandas_object(pd.DataFrame(frame), index=False).to_numpy()
+
+
+def column_values(series, scale=None, dates_as_text=False):
+    """Convert one column to a list of plain Python values (NaN/NaT -> None)"""
+    values = series.to_numpy()
+    missing = pd.isna(values)
+    if values.dtype.kind == "M":
+        values = values.astype("datetime64[D]")
+        if dates_as_text:
+            values = values.astype(str)  # 'YYYY-MM-DD', formatted in one NumPy pass
+    elif values.dtype.kind == "f" and scale is not None:
+        # Stored as the DECIMAL would store it (SQLite keeps the raw float otherwise)
+        values = values.astype("float64").round(scale)
+    values = values.astype(object)
+    values[missing] = None
+    return values.tolist()
+
+
+def build_rows(df):
+    """Build INSERT parameter tuples column-wise from NumPy arrays (no per-row Series)"""
+    store = database.backend()
+    columns = []
+    for source in SOURCE_COLUMNS:
+        series = df[source]
+        if source == "Row Hash" and store.signed_hashes:
+            # Same 64 bits as a signed integer
+            series = pd.Series(series.to_numpy(dtype="uint64").view("int64"), index=series.index)
+        columns.append(column_values(series, schema_dtypes.scale_of(source), store.dates_as_text))
+    return list(zip(*columns))
+
+
+def to_table_columns(df):
+    """Same rows, renamed to sales table column names (for the rollups)"""
+    return df.rename(columns=dict(COLUMN_MAP))
+
+
+def insert_rows(db, df):
+    """Original mode: one INSERT round trip per row, single commit"""
+    with db.cursor() as cursor:
+        for data in build_rows(df):
+            cursor.execute(insert_query, data)
+        rollups.apply_batch(cursor, to_table_columns(df))
+    db.commit()
+
+
+def insert_batches(db, df, batch_size=LOAD_BATCH_SIZE, upsert=False):
+    """
+    Multi-row executemany; each batch and its rollup update commit together.
+
+    On SQLite (a single writer) all batches share one transaction instead,
+    and the rollups are updated once for the whole frame.
+    """
+    if not df["Row ID"].is_monotonic_increasing:
+        # Primary key order appends to the clustered index / rowid B-tree
+        df = df.sort_values("Row ID", kind="mergesort")
+    commit_per_batch = database.backend().commit_per_batch
+    query = upsert_query() if upsert else insert_query
+    replaced = []
+    with db.cursor() as cursor:
+        for start in range(0, len(df), batch_size):
+            part = df.iloc[start:start + batch_size]
+            previous = rollups.fetch_previous(cursor, part["Row ID"]) if upsert else None
+            cursor.executemany(query, build_rows(part))
+            if commit_per_batch:
+                rollups.apply_batch(cursor, to_table_columns(part), previous)
+                db.commit()
+            elif upsert:
+                replaced.append(previous)
+        if not commit_per_batch:
+            rollups.apply_batch(cursor, to_table_columns(df),
+                                pd.concat(replaced) if upsert else None)
+    db.commit()
+
+
+def partition(df, strategy=LOAD_PARTITION, count=LOAD_WORKERS):
+    """Split df into disjoint partitions: `count` Row_ID ranges or one per Region x order year"""
+    if strategy == "row_id":
+        ordered = df.sort_values("Row ID", kind="mergesort")
+        bounds = np.linspace(0, len(ordered), count + 1).astype(int)
+        return [ordered.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    if strategy == "region_year":
+        keys = [df["Region"].astype(object).fillna(""), pd.to_datetime(df["Order Date"]).dt.year]
+        return [part for _, part in df.groupby(keys, sort=True)]
+    raise ValueError(f"Unknown LOAD_PARTITION '{strategy}', expected one of {LOAD_PARTITIONS}")
+
+
+def load_partition(part, batch_size, pool_size):
+    """
+    Insert one partition in its own transaction; transient failures retry just this partition.
+
+    Workers use their own pool of pool_size connections: the caller's
+    connection stays checked out of the default pool for the whole load.
+    """
+    attempts = 0
+
+    def attempt():
+        nonlocal attempts
+        attempts += 1
+        with database.connection(pool_size=pool_size, label="load_workers") as db:
+            with db.cursor() as cursor:
+                if attempts > 1:
+                    # The failed attempt may have committed before its connection dropped
+                    row_ids = part["Row ID"].astype("int64").tolist()
+                    for start in range(0, len(row_ids), batch_size):
+                        chunk = row_ids[start:start + batch_size]
+                        cursor.execute(f"DELETE FROM sales WHERE Row_ID IN "
+                                       f"({', '.join(['%s'] * len(chunk))})", chunk)
+                for start in range(0, len(part), batch_size):
+                    cursor.executemany(insert_query, build_rows(part.iloc[start:start + batch_size]))
+            db.commit()
+
+    database.retry(attempt)
+    return len(part)
+
+
+def count_rows(db):
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sales")
+        count = cursor.fetchone()[0]
+    db.commit()  # end the read snapshot so the next count sees new commits
+    return count
+
+
+def insert_parallel(db, df, batch_size=LOAD_BATCH_SIZE, workers=LOAD_WORKERS,
+                    strategy=LOAD_PARTITION):
+    """
+    Insert disjoint partitions concurrently over `workers` pooled connections.
+
+    Rollups are applied once for all committed partitions afterwards (on db), so
+    the workers never contend for the same rollup rows. The table's row count is
+    verified at the end.
+    """
+    parts = partition(df, strategy, workers)
+    before = count_rows(db)
+    print(f"Parallel load: {len(parts)} partition(s) by {strategy} over {workers} connection(s)")
+
+    loaded, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(load_partition, part, batch_size, workers) for part in parts]
+        for part, future in zip(parts, futures):
+            try:
+                future.result()
+                loaded.append(part)
+            except Exception as e:
+                failed.append(f"Row_ID {part['Row ID'].min()}-{part['Row ID'].max()}: {e}")
+
+    if loaded:
+        with db.cursor() as cursor:
+            rollups.apply_batch(cursor, to_table_columns(pd.concat(loaded)))
+        db.commit()
+    if failed:
+        raise RuntimeError(f"{len(failed)} partition(s) failed to load: " + "; ".join(failed))
+
+    inserted = count_rows(db) - before
+    if inserted != len(df):
+        raise RuntimeError(f"Row count check failed: expected {len(df)} new rows, found {inserted}")
+    print(f"Row count verified: {inserted} rows inserted")
+
+
+def load_infile(db, df):
+    """Write a temporary TSV file and bulk load it with LOAD DATA LOCAL INFILE"""
+    with tempfile.NamedTemporaryFile("w", suffix=".tsv", delete=False,
+                                     encoding="utf-8", newline="") as tmp:
+        df[SOURCE_COLUMNS].to_csv(tmp, sep="\t", header=False, index=False,
+                                  na_rep="NULL", date_format="%Y-%m-%d",
+                                  lineterminator="\n")
+    path = tmp.name.replace("\\", "/")
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(f"""
+                LOAD DATA LOCAL INFILE '{path}'
+                INTO TABLE sales
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY '\\t' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                LINES TERMINATED BY '\\n'
+                ({', '.join(TABLE_COLUMNS)})
+            """)
+            rollups.apply_batch(cursor, to_table_columns(df))
+        db.commit()
+    finally:
+        os.remove(tmp.name)
+
+
+def fetch_stored(db, start=None, end=None):
+    """
+    Row_ID high-water mark plus stored Row_IDs and Row_Hashes, sorted by Row_ID.
+
+    start/end limit the stored rows to that Order_Date range (the high-water
+    mark is always the table's).
+    """
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(Row_ID), 0) FROM sales")
+        high_water_mark = cursor.fetchone()[0]
+        if start is None:
+            cursor.execute("SELECT Row_ID, Row_Hash FROM sales")
+        else:
+            cursor.execute("SELECT Row_ID, Row_Hash FROM sales WHERE Order_Date BETWEEN %s AND %s",
+                           (start, end))
+        stored = cursor.fetchall()
+
+    stored_ids = np.array([row_id for row_id, _ in stored], dtype="int64")
+    stored_hashes = np.array([row_hash or 0 for _, row_hash in stored],
+                             dtype="int64" if database.backend().signed_hashes else "uint64")
+    stored_hashes = stored_hashes.view("uint64")
+    order = np.argsort(stored_ids)
+    return high_water_mark, stored_ids[order], stored_hashes[order]
+
+
+def split_incremental(db, df, stored=None):
+    """
+    Split df into rows above the Row_ID high-water mark and changed existing rows.
+
+    stored: a fetch_stored() snapshot to reuse across chunks (read from db if None).
+    """
+    high_water_mark, stored_ids, stored_hashes = stored or fetch_stored(db)
+    row_ids = df["Row ID"].to_numpy(dtype="int64")
+    is_new = row_ids > high_water_mark
+
+    # Rows at or below the mark are upserted only if missing or their hash differs
+    if len(stored_ids):
+        pos = np.searchsorted(stored_ids, row_ids).clip(max=len(stored_ids) - 1)
+        found = stored_ids[pos] == row_ids
+        unchanged = found & (stored_hashes[pos] == df["Row Hash"].to_numpy())
+    else:
+        unchanged = np.zeros(len(df), dtype=bool)
+    is_changed = ~is_new & ~unchanged
+
+    return df[is_new], df[is_changed], high_water_mark
+
+
+def record_batch(db, strategy, rows_inserted, rows_updated, max_row_id):
+    """Append one entry to the load_batches audit table"""
+    with db.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO load_batches (Loaded_At, Strategy, Rows_Inserted, Rows_Updated, Max_Row_ID) "
+            "VALUES (CURRENT_TIMESTAMP, %s, %s, %s, %s)",
+            (strategy, rows_inserted, rows_updated, max_row_id),
+        )
+    db.commit()
+
+
+def reset_tables(db):
+    """
+    Full reload: recreate sales from schema.sql (so it has the current
+    definition) and empty the rollups. Runs only once the cleaned data is
+    ready, so a failed clean leaves the stored data as it was.
+    """
+    query_cache.invalidate()
+    store = database.backend()
+    with db.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS sales")
+        with open(schema_dtypes.SCHEMA_FILE) as f:
+            for statement in store.schema_statements(f.read()):
+                cursor.execute(statement)
+        rollups.clear(cursor)
+    db.commit()
+
+
+def store_partitions():
+    """Partition path -> fingerprint of the cleaned store ({} if it is missing)"""
+    return partitioned_store.fingerprints(CLEANED_STORE_DIR)
+
+
+def loaded_partitions(db, partitions):
+    """
+    Partitions whose current contents are already in the sales table.
+
+    Valid only while the table still has the version recorded after the last
+    load (query_cache.fingerprint); any other change to it makes this empty.
+    """
+    try:
+        with open(LOAD_STATE_FILE) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+    if state.get("table") != query_cache.fingerprint(db):
+        return set()
+    loaded = state.get("partitions", {})
+    return {path for path, fingerprint in partitions.items() if loaded.get(path) == fingerprint}
+
+
+def record_partitions(db, partitions):
+    """After a load: these partitions are in the table at its current version"""
+    tmp = LOAD_STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"table": query_cache.fingerprint(db), "partitions": partitions}, f, indent=2)
+    os.replace(tmp, LOAD_STATE_FILE)
+
+
+def load(df=None, mode=LOAD_MODE, batch_size=LOAD_BATCH_SIZE, strategy=LOAD_STRATEGY,
+         partitions=None):
+    """
+    Load cleaned rows into the sales table and return rows/sec.
+
+    df=None reads the cleaned store. partitions: the store's partition
+    fingerprints that df holds (store_partitions()), taken automatically when
+    df is None. With them an incremental load skips the partitions that are
+    unchanged since the last load into this table, and the next load can
+    skip the ones written now.
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown LOAD_MODE '{mode}', expected one of {LOAD_MODES}")
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unknown LOAD_STRATEGY '{strategy}', expected one of {LOAD_STRATEGIES}")
+    store = database.backend()
+    if mode == "infile" and not store.supports_infile:
+        raise ValueError(f"LOAD_MODE=infile needs LOAD DATA LOCAL INFILE (MySQL); "
+                         f"use batch with DB_BACKEND={store.name}")
+    if mode == "parallel" and not store.commit_per_batch:
+        print(f"Note: {store.name} has a single writer, so parallel partitions are written one at a time")
+
+    if df is None:
+        partitions = store_partitions()
+
+    # LOAD DATA LOCAL INFILE must be enabled per connection
+    options = {"allow_local_infile": True} if mode == "infile" else {}
+    with database.connection(**options) as db:
+        start = time.perf_counter()
+        skipped = set()
+        if strategy == "incremental" and partitions:
+            skipped = loaded_partitions(db, partitions)
+            print(f"Cleaned store: {len(partitions) - len(skipped)} of {len(partitions)} "
+                  f"partitions changed since the last load")
+
+        with metrics.stage("load.prepare") as m:
+            if df is None:
+                df = read_cleaned([path for path in partitions if path not in skipped])
+            elif skipped:
+                df = df[~partitioned_store.in_partitions(df, skipped)]
+            m["rows_in"] = len(df)
+            df = df.assign(**{"Row Hash": row_hashes(df)})
+
+        if strategy == "incremental":
+            with metrics.stage("load.diff") as m:
+                m["rows_in"] = len(df)
+                # Unchanged rows of the partitions read lie in their date range
+                stored = fetch_stored(db, df["Order Date"].min().date(), df["Order Date"].max().date()) \
+                    if skipped and len(df) else None
+                new_rows, changed_rows, high_water_mark = split_incremental(db, df, stored)
+                m["rows_out"] = len(new_rows) + len(changed_rows)
+            print(f"Incremental load from Row_ID > {high_water_mark}: "
+                  f"{len(new_rows)} new, {len(changed_rows)} changed, "
+                  f"{len(df) - len(new_rows) - len(changed_rows)} unchanged")
+        else:
+            new_rows, changed_rows = df, df.iloc[0:0]
+            reset_tables(db)
+        if strategy == "full" or len(new_rows) or len(changed_rows):
+            query_cache.invalidate()
+
+        with metrics.stage("load.write") as m:
+            m["rows_out"] = len(new_rows) + len(changed_rows)
+            if len(new_rows):
+                if mode == "infile":
+                    load_infile(db, new_rows)
+                elif mode == "parallel":
+                    insert_parallel(db, new_rows, batch_size)
+                elif mode == "batch":
+                    insert_batches(db, new_rows, batch_size)
+                else:
+                    insert_rows(db, new_rows)
+            if len(changed_rows):
+                insert_batches(db, changed_rows, batch_size, upsert=True)
+
+        if len(new_rows) or len(changed_rows):
+            record_batch(db, strategy, len(new_rows), len(changed_rows),
+                         int(df["Row ID"].max()))
+        query_cache.record_version(db)
+        if partitions:
+            record_partitions(db, partitions)
+    elapsed = time.perf_counter() - start
+
+    written = len(new_rows) + len(changed_rows)
+    rows_per_sec = written / elapsed if elapsed > 0 else float("inf")
+    print(f"Success: Uploaded {written} rows to the {database.backend().name} database")
+    label = mode
+    if mode == "batch":
+        label = f"batch (batch size {batch_size})"
+    elif mode == "parallel":
+        label = f"parallel ({LOAD_WORKERS} workers, {LOAD_PARTITION}, batch size {batch_size})"
+    print(f"Load mode: {label} | {elapsed:.2f}s | {rows_per_sec:,.0f} rows/sec")
+    return rows_per_sec
+
+
+def load_chunks(chunks, batch_size=LOAD_BATCH_SIZE, strategy=LOAD_STRATEGY):
+    """
+    Load cleaned chunks as they arrive (pipelined mode); returns rows written.
+
+    Each chunk is inserted with multi-row batches that commit together with
+    their rollup update. For incremental loads the stored Row_ID/hash snapshot
+    is read once, before the first chunk.
+    """
+    if strategy not in LOAD_STRATEGIES:
+        raise ValueError(f"Unknown LOAD_STRATEGY '{strategy}', expected one of {LOAD_STRATEGIES}")
+
+    inserted = updated = 0
+    max_row_id = None
+    with database.connection() as db:
+        start = time.perf_counter()
+        if strategy == "incremental":
+            stored = fetch_stored(db)
+        # A full reload empties the tables when the first cleaned chunk arrives,
+        # so a clean that fails before producing any rows leaves them intact
+        reset = strategy == "full"
+
+        for chunk in chunks:
+            if reset:
+                reset_tables(db)
+                reset = False
+            chunk = chunk[DATA_COLUMNS]
+            chunk = chunk.assign(**{"Row Hash": row_hashes(chunk)})
+            if strategy == "incremental":
+                new_rows, changed_rows, _ = split_incremental(db, chunk, stored)
+            else:
+                new_rows, changed_rows = chunk, chunk.iloc[0:0]
+            if inserted + updated == 0 and len(new_rows) + len(changed_rows):
+                query_cache.invalidate()  # first write of an incremental load
+            if len(new_rows):
+                insert_batches(db, new_rows, batch_size)
+            if len(changed_rows):
+                insert_batches(db, changed_rows, batch_size, upsert=True)
+            inserted += len(new_rows)
+            updated += len(changed_rows)
+            if len(chunk):
+                chunk_max = int(chunk["Row ID"].max())
+                max_row_id = chunk_max if max_row_id is None else max(max_row_id, chunk_max)
+
+        if reset:
+            reset_tables(db)  # full reload of an input without chunks
+        if inserted or updated:
+            record_batch(db, strategy, inserted, updated, max_row_id)
+        query_cache.record_version(db)
+    elapsed = time.perf_counter() - start
+
+    written = inserted + updated
+    rows_per_sec = written / elapsed if elapsed > 0 else float("inf")
+    print(f"Success: Uploaded {written} rows to the {database.backend().name} database "
+          f"({inserted} new, {updated} changed)")
+    print(f"Load mode: pipelined (batch size {batch_size}) | {elapsed:.2f}s | "
+          f"{rows_per_sec:,.0f} rows/sec")
+    return written
+
+
+def read_cleaned(paths=None):
+    """Open only the loaded columns (of the given partitions) from the cleaned store (CSV as fallback)"""
+    if partitioned_store.dataset_exists(CLEANED_STORE_DIR):
+        return partitioned_store.read_dataset(CLEANED_STORE_DIR, columns=DATA_COLUMNS, paths=paths)
+    options = schema_dtypes.csv_read_options(CLEANED_DATA_FILE, date_format="%Y-%m-%d")
+    return schema_dtypes.apply(pd.read_csv(CLEANED_DATA_FILE, usecols=DATA_COLUMNS, **options))
+
+
+if __name__ == "__main__":
+    ensure_dirs()
+    with metrics.stage("load"):
+        load()
+    metrics.write_report()
@@ -0,0 +1,156 @@
+"""
+Per-stage performance instrumentation.
+
+Wrap a stage or sub-step in `with metrics.stage("name") as m:` and set
+m["rows_in"] / m["rows_out"] inside it. Wall time, CPU time, peak RSS,
+rows/sec and database round trips (for connections passed to track_db) are
+recorded and written to RUN_METRICS_FILE by write_report().
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import threading
+import cProfile
+import tracemalloc
+import json
+import time
+import sys
+import os
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OUTPUT_DIR, RUN_METRICS_FILE, METRICS_PROFILE
+
+_records = []
+_lock = threading.Lock()
+_local = threading.local()
+_started_at = datetime.now().isoformat(timespec="seconds")
+# Top-level stages measured with tracemalloc: id(record) -> [traced bytes at start, overlapped]
+_traced = {}
+
+
+def _active():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _trace_start(record):
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()  # once per run; each stage only resets the peak
+        if _traced:
+            # The peak is process-wide, so stages running at the same time
+            # cannot be told apart: none of them gets a peak
+            for entry in _traced.values():
+                entry[1] = True
+        else:
+            tracemalloc.reset_peak()
+        _traced[id(record)] = [tracemalloc.get_traced_memory()[0], bool(_traced)]
+
+
+def _trace_stop(record):
+    with _lock:
+        start, overlapped = _traced.pop(id(record))
+        peak = tracemalloc.get_traced_memory()[1]
+    record["tracemalloc_peak_mb"] = None if overlapped else round((peak - start) / 2**20, 1)
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def stage(name, profile=METRICS_PROFILE):
+    """Measure one stage or sub-step; nested calls record their parent"""
+    stack = _active()
+    record = {
+        "name": name,
+        "parent": stack[-1]["name"] if stack else None,
+        "rows_in": None,
+        "rows_out": None,
+        "db_round_trips": 0,
+    }
+    top_level = not stack
+    profiler = None
+    if top_level and profile == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif top_level and profile == "tracemalloc":
+        _trace_start(record)
+
+    stack.append(record)
+    wall, cpu, children = time.perf_counter(), time.thread_time(), _children_cpu()
+    try:
+        yield record
+    finally:
+        record["wall_s"] = round(time.perf_counter() - wall, 4)
+        record["cpu_s"] = round(time.thread_time() - cpu + _children_cpu() - children, 4)
+        record["peak_rss_mb"] = _peak_rss_mb()
+        rows = record["rows_out"] if record["rows_out"] is not None else record["rows_in"]
+        record["rows_per_sec"] = (round(rows / record["wall_s"], 1)
+                                  if rows and record["wall_s"] > 0 else None)
+        stack.pop()
+
+        if profiler is not None:
+            profiler.disable()
+            profile_dir = os.path.join(OUTPUT_DIR, "profiles")
+            os.makedirs(profile_dir, exist_ok=True)
+            record["profile"] = os.path.join(profile_dir, f"{name}.prof")
+            profiler.dump_stats(record["profile"])
+        elif top_level and profile == "tracemalloc":
+            _trace_stop(record)
+
+        with _lock:
+            _records.append(record)
+
+
+def add_round_trips(count=1):
+    """Charge database round trips to every stage active in this thread"""
+    for record in _active():
+        record["db_round_trips"] += count
+
+
+def track_db(db):
+    """Count every statement sent over this connection as one round trip"""
+    connection = getattr(db, "_cnx", db)  # pooled connections wrap the real one
+    if getattr(connection, "_metrics_tracked", False) or not hasattr(connection, "cmd_query"):
+        return db  # already tracked, or counts its own statements (SQLite cursors)
+    cmd_query = connection.cmd_query
+
+    def counted(*args, **kwargs):
+        add_round_trips()
+        return cmd_query(*args, **kwargs)
+
+    connection.cmd_query = counted
+    connection._metrics_tracked = True
+    return db
+
+
+def write_report(path=RUN_METRICS_FILE):
+    """Write all recorded stages (in completion order) as JSON"""
+    with _lock:
+        report = {
+            "started_at": _started_at,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "profile": METRICS_PROFILE or None,
+            "stages": list(_records),
+        }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,225 @@
+"""
+Hive-style partitioned dataset for the cleaned data.
+
+Rows are split by order month into Year=YYYY/Month=MM/ directories. Each
+partition is a columnar store (scripts/columnar_store.py) with its own string
+dictionaries and, by default, gzip-compressed column files. A dataset.json at
+the root lists every partition with its row count and content fingerprint.
+
+- Partitions are compressed and written by STORE_WORKERS threads (zlib releases
+  the GIL while it compresses).
+- A partition whose contents did not change keeps its existing files, so a run
+  that only adds recent rows rewrites only the recent months.
+- read_dataset() opens only the partitions that overlap a date range, and only
+  the requested columns of those.
+
+    df = read_dataset(CLEANED_STORE_DIR, columns=["Order Date", "Sales"],
+                      start="2017-10-01", end="2017-12-31")
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+import shutil
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import STORE_COMPRESSION, STORE_COMPRESSION_LEVEL, STORE_WORKERS
+from scripts.columnar_store import ColumnarWriter, read_store
+
+DATASET_FILE = "dataset.json"
+PARTITION_COLUMN = "Order Date"
+
+
+def partition_path(year, month):
+    return f"Year={year:04d}/Month={month:02d}"
+
+
+def month_key(value):
+    """YYYYMM of a date, comparable with a partition's key"""
+    value = pd.Timestamp(value)
+    return value.year * 100 + value.month
+
+
+def _map(function, items, workers):
+    if workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(function, items))
+
+
+class PartitionedWriter:
+    """Append cleaned chunks; each row goes to the partition of its order month. close() publishes"""
+
+    def __init__(self, directory, compression=STORE_COMPRESSION, level=STORE_COMPRESSION_LEVEL,
+                 workers=STORE_WORKERS):
+        self.directory = directory
+        self.compression = None if compression == "none" else compression
+        self.level = level
+        self.workers = workers
+        self.writers = {}  # (year, month) -> ColumnarWriter
+        self.columns = None
+
+    def _writer(self, key):
+        if key not in self.writers:
+            path = os.path.join(self.directory, partition_path(*key))
+            self.writers[key] = ColumnarWriter(path, self.compression, self.level)
+        return self.writers[key]
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        dates = df[PARTITION_COLUMN]
+        if dates.isna().any():
+            raise ValueError(f"Rows without {PARTITION_COLUMN} cannot be partitioned")
+        parts = [(self._writer((int(year), int(month))), part) for (year, month), part
+                 in df.groupby([dates.dt.year, dates.dt.month], sort=True)]
+        _map(lambda item: item[0].append(item[1]), parts, self.workers)
+
+    def close(self):
+        """Publish the dataset; returns (partitions written, partitions unchanged)"""
+        keys = sorted(self.writers)
+        written = _map(lambda key: self.writers[key].close(), keys, self.workers)
+
+        partitions = [{"path": partition_path(*key), "year": key[0], "month": key[1],
+                       "rows": self.writers[key].row_count,
+                       "fingerprint": self.writers[key].fingerprint} for key in keys]
+        dataset = {"partition_by": ["Year", "Month"], "column": PARTITION_COLUMN,
+                   "compression": self.compression, "columns": self.columns or [],
+                   "row_count": sum(p["rows"] for p in partitions), "partitions": partitions}
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = os.path.join(self.directory, DATASET_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(dataset, f, indent=2)
+        os.replace(tmp, os.path.join(self.directory, DATASET_FILE))
+
+        # Months that are no longer in the data (and files from an older layout)
+        keep = {p["path"] for p in partitions}
+        for year in os.listdir(self.directory):
+            path = os.path.join(self.directory, year)
+            if year == DATASET_FILE:
+                continue
+            if not os.path.isdir(path):
+                os.remove(path)
+                continue
+            for month in os.listdir(path):
+                if f"{year}/{month}" not in keep:
+                    shutil.rmtree(os.path.join(path, month), ignore_errors=True)
+            if not os.listdir(path):
+                os.rmdir(path)
+
+        count = sum(written)
+        return count, len(written) - count
+
+
+def write_dataset(df, directory, **options):
+    """Write a whole DataFrame as a partitioned dataset; returns (written, unchanged)"""
+    writer = PartitionedWriter(directory, **options)
+    writer.append(df)
+    return writer.close()
+
+
+def dataset_exists(directory):
+    return os.path.exists(os.path.join(directory, DATASET_FILE))
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, DATASET_FILE)) as f:
+        return json.load(f)
+
+
+def list_partitions(directory, start=None, end=None):
+    """dataset.json entries of the partitions whose month overlaps start..end (both inclusive)"""
+    partitions = read_manifest(directory)["partitions"]
+    low = month_key(start) if start is not None else None
+    high = month_key(end) if end is not None else None
+    return [p for p in partitions
+            if (low is None or p["year"] * 100 + p["month"] >= low)
+            and (high is None or p["year"] * 100 + p["month"] <= high)]
+
+
+def fingerprints(directory):
+    """Partition path -> content fingerprint, or {} if there is no dataset"""
+    if not dataset_exists(directory):
+        return {}
+    return {p["path"]: p["fingerprint"] for p in read_manifest(directory)["partitions"]}
+
+
+def in_partitions(df, paths):
+    """Mask of the rows of df whose order month is one of the partition paths"""
+    dates = df[PARTITION_COLUMN]
+    months = (dates.dt.year * 100 + dates.dt.month).to_numpy()
+    wanted = [key for key in np.unique(months) if partition_path(key // 100, key % 100) in paths]
+    return np.isin(months, wanted)
+
+
+def concat_frames(frames):
+    """
+    Concatenate frames that share columns, keeping categorical columns.
+
+    Categories are unioned and sorted once per column and each frame's codes
+    are remapped onto them, instead of letting pd.concat compare and re-hash
+    the categories of every frame pair.
+    """
+    data = {}
+    for column in frames[0].columns:
+        parts = [frame[column] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            categories = pd.Index(np.sort(pd.unique(np.concatenate(
+                [part.cat.categories.to_numpy(dtype=object) for part in parts]))))
+            codes = []
+            for part in parts:
+                # The appended -1 keeps missing values (code -1) missing
+                mapping = np.append(categories.get_indexer(part.cat.categories), -1)
+                codes.append(mapping[part.cat.codes.to_numpy()])
+            data[column] = pd.Categorical.from_codes(np.concatenate(codes),
+                                                     dtype=pd.CategoricalDtype(categories))
+        else:
+            data[column] = np.concatenate([part.to_numpy() for part in parts])
+    return pd.DataFrame(data, columns=frames[0].columns, copy=False)
+
+
+def read_dataset(directory, columns=None, start=None, end=None, paths=None, workers=STORE_WORKERS):
+    """
+    Read a partitioned dataset as one DataFrame, in month order.
+
+    start/end keep rows with start <= Order Date <= end; only overlapping
+    partitions are opened, and rows are filtered only in the first and last
+    month. paths restricts the read to those partitions. Only the requested
+    columns are read.
+    """
+    manifest = read_manifest(directory)
+    names = manifest["columns"] if columns is None else list(columns)
+    partitions = list_partitions(directory, start, end)
+    if paths is not None:
+        paths = set(paths)
+        partitions = [p for p in partitions if p["path"] in paths]
+
+    low = pd.Timestamp(start) if start is not None else None
+    high = pd.Timestamp(end) if end is not None else None
+    boundary = {month_key(value) for value in (low, high) if value is not None}
+
+    def read(partition):
+        edge = partition["year"] * 100 + partition["month"] in boundary
+        wanted = names + [PARTITION_COLUMN] if edge and PARTITION_COLUMN not in names else names
+        df = read_store(os.path.join(directory, partition["path"]), columns=wanted)
+        if edge:
+            dates = df[PARTITION_COLUMN]
+            mask = pd.Series(True, index=df.index)
+            if low is not None:
+                mask &= dates >= low
+            if high is not None:
+                mask &= dates <= high
+            df = df.loc[mask, names]
+        return df
+
+    frames = _map(read, partitions, workers)
+    if not frames:
+        if not manifest["partitions"]:
+            return pd.DataFrame(columns=names)
+        # Nothing matched: an empty frame with the stored dtypes
+        first = os.path.join(directory, manifest["partitions"][0]["path"])
+        return read_store(first, columns=names).iloc[0:0].reset_index(drop=True)
+    return concat_frames(frames)
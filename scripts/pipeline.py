@@ -0,0 +1,132 @@
+"""
+Pipelined clean -> load.
+
+The raw file is cleaned chunk by chunk (cleaning_analysis.run_streaming) and
+every cleaned chunk is handed to a loader thread through a bounded queue, so
+parsing and cleaning the next chunk overlaps with inserting the previous one.
+The cleaner blocks while PIPELINE_QUEUE_SIZE chunks are waiting, which bounds
+memory to a few chunks however far the database falls behind.
+
+A failure on either side cancels the other through a shared event: the
+cleaner stops reading, the loader rolls back its open transaction, and the
+original error is raised. Batches committed before the failure stay in the
+table (a full reload starts from an empty table again).
+"""
+
+import threading
+import queue
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (CLEAN_CHUNK_SIZE, PIPELINE_QUEUE_SIZE, LOAD_MODE, LOAD_BATCH_SIZE,
+                    LOAD_STRATEGY, ensure_dirs)
+from scripts import cleaning_analysis, load_to_mysql, metrics
+
+DEFAULT_CHUNK_SIZE = 100_000
+POLL_S = 0.1  # how often a blocked side checks for cancellation
+_END = object()  # end-of-stream marker
+
+
+class PipelineCancelled(Exception):
+    """Raised on one side of the pipeline after the other side failed"""
+
+
+class ChunkLoader(threading.Thread):
+    """Consumer thread: loads the chunks put() into its bounded queue"""
+
+    def __init__(self, queue_size=PIPELINE_QUEUE_SIZE, batch_size=LOAD_BATCH_SIZE,
+                 strategy=LOAD_STRATEGY):
+        super().__init__(name="chunk-loader", daemon=True)
+        self.queue = queue.Queue(maxsize=max(queue_size, 1))
+        self.cancelled = threading.Event()
+        self.batch_size = batch_size
+        self.strategy = strategy
+        self.error = None
+        self.chunks = 0
+        self.producer_wait_s = 0.0  # cleaner blocked on a full queue
+        self.consumer_wait_s = 0.0  # loader idle on an empty queue
+
+    def _put(self, item):
+        start = time.perf_counter()
+        while True:
+            if self.cancelled.is_set():
+                raise PipelineCancelled("loader stopped")
+            try:
+                self.queue.put(item, timeout=POLL_S)
+                break
+            except queue.Full:
+                continue
+        self.producer_wait_s += time.perf_counter() - start
+
+    def put(self, chunk):
+        """Hand over one cleaned chunk; blocks while the queue is full"""
+        self._put(chunk)
+
+    def finish(self):
+        """Signal the end of the stream, wait for the loader and re-raise its error"""
+        self._put(_END)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def cancel(self):
+        """Stop the loader after a cleaning failure (its open transaction rolls back)"""
+        self.cancelled.set()
+        self.join()
+
+    def _chunks(self):
+        while True:
+            start = time.perf_counter()
+            while True:
+                if self.cancelled.is_set():
+                    raise PipelineCancelled("cleaning stopped")
+                try:
+                    item = self.queue.get(timeout=POLL_S)
+                    break
+                except queue.Empty:
+                    continue
+            self.consumer_wait_s += time.perf_counter() - start
+            if item is _END:
+                return
+            self.chunks += 1
+            yield item
+
+    def run(self):
+        try:
+            with metrics.stage("load") as m:
+                m["rows_out"] = load_to_mysql.load_chunks(self._chunks(), self.batch_size,
+                                                          self.strategy)
+        except BaseException as e:
+            self.error = e
+            self.cancelled.set()
+
+
+def run(chunk_size=CLEAN_CHUNK_SIZE or DEFAULT_CHUNK_SIZE, queue_size=PIPELINE_QUEUE_SIZE):
+    """Clean the raw file and load it at the same time; raises the first failure"""
+    if LOAD_MODE != "batch":
+        print(f"Note: pipelined load inserts each chunk in batches (LOAD_MODE={LOAD_MODE} ignored)")
+    loader = ChunkLoader(queue_size)
+    loader.start()
+    try:
+        with metrics.stage("clean"):
+            cleaning_analysis.run_streaming(chunk_size, on_chunk=loader.put)
+    except PipelineCancelled:
+        # The loader failed first: its error is the cause
+        loader.join()
+        raise loader.error
+    except BaseException:
+        loader.cancel()
+        raise
+    loader.finish()
+
+    print(f"Pipeline: {loader.chunks} chunk(s) of up to {chunk_size} rows, queue size "
+          f"{loader.queue.maxsize} | cleaner waited {loader.producer_wait_s:.2f}s for the "
+          f"loader, loader waited {loader.consumer_wait_s:.2f}s for the cleaner")
+
+
+if __name__ == "__main__":
+    ensure_dirs()
+    run()
+    metrics.write_report()
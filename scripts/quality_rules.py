@@ -0,0 +1,115 @@
+"""
+Data-quality rules for the cleaned dataset.
+
+Every rule is a vectorized check over a whole DataFrame (raw CSV column
+names) returning True for rows that pass. All rules are evaluated together
+into one boolean frame; rows failing any rule are quarantined with the names
+of the rules they broke instead of being dropped silently. Besides the
+business rules, rules are generated from schema.sql so that no row that
+would be rejected by the MySQL insert (NULL key, over-long VARCHAR, value
+outside the DECIMAL/INT range, duplicate primary key) reaches the loader.
+"""
+
+import pandas as pd
+import numpy as np
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import QUARANTINE_FILE, QUALITY_REPORT_FILE
+from scripts.schema_dtypes import SCHEMA, table_column
+
+INT_RANGE = (-2**31, 2**31 - 1)
+
+
+def _ignore_missing(df, columns, passes):
+    """Value rules pass on missing values; those are reported by not_null only"""
+    return passes | df[columns].isna().any(axis=1)
+
+
+def _text_lengths(series):
+    """Character length per value, computed once per category for categoricals"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        lengths = series.cat.categories.astype(str).str.len().to_numpy()
+        codes = series.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, lengths[codes], 0), index=series.index)
+    return series.astype(str).str.len().where(series.notna(), 0)
+
+
+# name -> check(df) -> boolean Series, True = row passes
+BUSINESS_RULES = {
+    "ship_after_order": lambda df: _ignore_missing(
+        df, ["Order Date", "Ship Date"], df["Ship Date"] >= df["Order Date"]),
+    "sales_positive": lambda df: _ignore_missing(df, ["Sales"], df["Sales"] > 0),
+    "discount_in_range": lambda df: _ignore_missing(df, ["Discount"], df["Discount"].between(0, 1)),
+}
+
+
+def schema_rules(columns):
+    """not_null / max_length / decimal_range / int_range rules for the given CSV columns"""
+    rules = {}
+    for column in columns:
+        if table_column(column) not in SCHEMA:
+            continue
+        sql_type, precision, scale, _ = SCHEMA[table_column(column)]
+        # Every column is required: the analysis and rollups need complete rows
+        rules[f"not_null:{column}"] = lambda df, c=column: df[c].notna()
+        if sql_type == "VARCHAR":
+            rules[f"max_length:{column}"] = \
+                lambda df, c=column, n=precision: _text_lengths(df[c]) <= n
+        elif sql_type == "DECIMAL":
+            limit = 10.0 ** (precision - scale)
+            rules[f"decimal_range:{column}"] = lambda df, c=column, limit=limit, s=scale: \
+                _ignore_missing(df, [c], df[c].abs().round(s) < limit)
+        elif sql_type == "INT":
+            rules[f"int_range:{column}"] = lambda df, c=column: _ignore_missing(
+                df, [c], df[c].between(*INT_RANGE))
+    return rules
+
+
+def evaluate(df, seen_row_ids=None):
+    """
+    One boolean column per rule, True where the row FAILS it.
+
+    seen_row_ids (sorted int64 array) holds primary keys already accepted from
+    earlier chunks; within df the first occurrence of a Row ID wins.
+    """
+    rules = {**schema_rules(df.columns), **BUSINESS_RULES}
+    failures = pd.DataFrame({name: ~check(df).to_numpy(dtype=bool) for name, check in rules.items()},
+                            index=df.index)
+
+    duplicate = df["Row ID"].duplicated().to_numpy()
+    if seen_row_ids is not None and len(seen_row_ids):
+        duplicate |= np.isin(df["Row ID"].to_numpy(), seen_row_ids)
+    failures["unique_row_id"] = duplicate
+    return failures
+
+
+def split(df, seen_row_ids=None):
+    """Returns (valid rows, quarantined rows with a Reasons column, failures per rule)"""
+    failures = evaluate(df, seen_row_ids)
+    failed = failures.any(axis=1).to_numpy()
+
+    quarantined = df[failed].copy()
+    # "rule;" for each failed rule, concatenated per row
+    reasons = failures[failed].to_numpy(dtype=object) @ (failures.columns + ";").to_numpy(dtype=object)
+    quarantined["Reasons"] = pd.Series(reasons, index=quarantined.index, dtype=object).str.rstrip(";")
+    return df[~failed], quarantined, failures.sum()
+
+
+def write_quarantine(quarantined, append=False, path=QUARANTINE_FILE):
+    quarantined.to_csv(path, index=False, mode="a" if append else "w", header=not append)
+
+
+def write_report(rows_checked, counts, rows_quarantined, path=QUALITY_REPORT_FILE):
+    """Per-rule failure counts as JSON (a row can fail several rules)"""
+    report = {
+        "rows_checked": int(rows_checked),
+        "rows_quarantined": int(rows_quarantined),
+        "rules": {name: int(count) for name, count in counts.items()},
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
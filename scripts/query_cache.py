@@ -0,0 +1,260 @@
+"""
+On-disk cache for the analytics queries (charts, verify_correlation).
+
+Each entry is keyed on the SQL text and stamped with a version of the sales
+table: (row count, max Row_ID, last load_batches id). An entry is only used
+while the table still has that version. Entries live as pickles in
+QUERY_CACHE_DIR. Reading an entry refreshes its modification time, and the
+least recently used entries are evicted once the directory exceeds
+QUERY_CACHE_MAX_MB.
+
+The loader invalidates the cache before it writes, and afterwards records the
+table's new version in a marker file. As long as that marker exists, a
+repeat run answers every cached query without opening a database connection.
+If the table is changed outside the loader, clear the cache with
+`python scripts/query_cache.py --clear`.
+
+    with query_cache.connection() as db:   # connects lazily, on the first miss
+        with db.cursor() as cursor:
+            cursor.execute("SELECT Region, SUM(Sales) FROM sales GROUP BY Region")
+            rows = cursor.fetchall()
+"""
+
+from contextlib import ExitStack
+import argparse
+import hashlib
+import pickle
+import glob
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import QUERY_CACHE, QUERY_CACHE_DIR, QUERY_CACHE_MAX_MB
+from scripts import database
+
+VERSION_FILE = os.path.join(QUERY_CACHE_DIR, "table_version.json")
+
+FINGERPRINT_SQL = ("SELECT (SELECT COUNT(*) FROM sales), "
+                   "(SELECT COALESCE(MAX(Row_ID), 0) FROM sales), "
+                   "(SELECT COALESCE(MAX(Batch_ID), 0) FROM load_batches)")
+
+
+def fingerprint(db):
+    """Cheap version of the sales table: row count, max Row_ID, last load batch id"""
+    with db.cursor() as cursor:
+        cursor.execute(FINGERPRINT_SQL)
+        version = [int(value) for value in cursor.fetchone()]
+    db.commit()  # end the read snapshot
+    return database.identity() + version
+
+
+def read_version():
+    """Table version recorded by the loader, or None"""
+    try:
+        with open(VERSION_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_version(version):
+    os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+    with open(VERSION_FILE, "w") as f:
+        json.dump(version, f)
+
+
+def invalidate():
+    """Drop every cached result and the version marker (the table is about to change)"""
+    for path in glob.glob(os.path.join(QUERY_CACHE_DIR, "*.pkl")) + [VERSION_FILE]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def record_version(db):
+    """Called by the loader once its writes are committed"""
+    if QUERY_CACHE:
+        write_version(fingerprint(db))
+
+
+def _entry_path(key):
+    return os.path.join(QUERY_CACHE_DIR, hashlib.sha256(key.encode()).hexdigest() + ".pkl")
+
+
+def get(key, version):
+    """Cached value for key at this table version, or None"""
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            stored_key, stored_version, value = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if stored_key != key or stored_version != version:
+        return None
+    os.utime(path)  # most recently used
+    return value
+
+
+def put(key, version, value, max_bytes=None):
+    """Store a value; skipped if it alone exceeds the cache size, then evict LRU entries"""
+    max_bytes = max_bytes or QUERY_CACHE_MAX_MB * 2**20
+    data = pickle.dumps((key, version, value), protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) > max_bytes:
+        return False
+    os.makedirs(QUERY_CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+    evict(max_bytes)
+    return True
+
+
+def evict(max_bytes=None):
+    """Remove least recently used entries until the cache fits in max_bytes"""
+    max_bytes = max_bytes or QUERY_CACHE_MAX_MB * 2**20
+    entries = []
+    for path in glob.glob(os.path.join(QUERY_CACHE_DIR, "*.pkl")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+class CachedCursor:
+    """Read-only cursor that answers execute() from the cache when it can"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.description = None
+        self._rows = []
+        self._position = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        key = sql if params is None else f"{sql} -- {params!r}"
+
+        def run(db):
+            with db.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall(), cursor.description
+
+        self._rows, self.description = self.connection.memoize(key, run)
+        self._position = 0
+
+    @property
+    def column_names(self):
+        return [column[0] for column in self.description or []]
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=1):
+        rows = self._rows[self._position:self._position + size]
+        self._position += len(rows)
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self._rows) - self._position)
+
+    def close(self):
+        self._rows = []
+
+
+class CachedConnection:
+    """
+    Stands in for a database connection in read-only analytics code.
+
+    The real pooled connection is opened on the first cache miss only.
+    """
+
+    def __init__(self, enabled=QUERY_CACHE):
+        self.enabled = enabled
+        self.hits = self.misses = 0
+        self._stack = ExitStack()
+        self._db = None
+        self._version = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return self._stack.__exit__(*exc)
+
+    @property
+    def db(self):
+        """The real connection, checked out on first use"""
+        if self._db is None:
+            self._db = self._stack.enter_context(database.connection())
+        return self._db
+
+    @property
+    def version(self):
+        if self._version is None:
+            self._version = read_version()
+            # A marker written for another database does not apply
+            if self._version is None or self._version[:2] != database.identity():
+                self._version = fingerprint(self.db)
+                write_version(self._version)
+        return self._version
+
+    def cursor(self, **options):
+        return CachedCursor(self)
+
+    def memoize(self, key, compute):
+        """compute(db) on a miss, the cached value on a hit"""
+        if self.enabled:
+            value = get(key, self.version)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        value = compute(self.db)
+        if self.enabled:
+            put(key, self.version, value)
+        return value
+
+    def commit(self):
+        pass
+
+    def summary(self):
+        return f"Query cache: {self.hits} hit(s), {self.misses} miss(es)" + \
+            ("" if self.enabled else " (disabled)")
+
+
+def connection(enabled=QUERY_CACHE):
+    return CachedConnection(enabled)
+
+
+def stats():
+    entries = glob.glob(os.path.join(QUERY_CACHE_DIR, "*.pkl"))
+    size = sum(os.path.getsize(path) for path in entries)
+    return len(entries), size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the query result cache")
+    parser.add_argument("--clear", action="store_true", help="remove all cached results")
+    args = parser.parse_args()
+    if args.clear:
+        invalidate()
+        print(f"Cleared {QUERY_CACHE_DIR}")
+    count, size = stats()
+    print(f"{count} cached result(s), {size / 2**20:.2f} MB of {QUERY_CACHE_MAX_MB} MB; "
+          f"table version: {read_version()}")
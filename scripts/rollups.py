@@ -0,0 +1,160 @@
+"""
+Materialized rollup tables.
+
+The loader folds every inserted/updated batch into the rollup tables in the
+same transaction as the sales rows, so the rollups always match the fact
+table. Only the buckets touched by a batch are written.
+"""
+
+import pandas as pd
+import numpy as np
+
+from scripts import database
+
+# rollup table -> bucket key columns (Year is implied by Year_Month)
+ROLLUPS = {
+    "rollup_monthly": ["Year_Month", "Year", "Category", "Region", "Segment"],
+    "rollup_product": ["Product_Name"],
+    "rollup_state": ["State"],
+}
+MEASURES = ["Sales", "Profit", "Quantity", "Order_Lines"]
+
+# sales columns needed to compute a batch's contribution
+SOURCE_COLUMNS = ["Order_Date", "Category", "Region", "Segment", "Product_Name",
+                  "State", "Sales", "Profit", "Quantity"]
+
+# Keys derived from Order_Date when recomputing from the sales table (SQL per backend)
+DATE_KEYS = ("Year_Month", "Year")
+
+
+def recompute_sql(table):
+    """Full GROUP BY over sales producing the expected contents of one rollup"""
+    keys = ROLLUPS[table]
+    select = []
+    for key in keys:
+        if key in DATE_KEYS:
+            expression = database.backend().date_part(key, "Order_Date")
+        else:
+            expression = f"COALESCE({key}, '')"
+        select.append(f"{expression} AS {key}")
+    select += ["SUM(Sales) AS Sales", "SUM(Profit) AS Profit",
+               "SUM(Quantity) AS Quantity", "COUNT(*) AS Order_Lines"]
+    return (f"SELECT {', '.join(select)} FROM sales "
+            f"GROUP BY {', '.join(keys)} ORDER BY {', '.join(keys)}")
+
+
+def contributions(frame):
+    """Per-bucket sums of a batch of sales rows (sales table column names)"""
+    order_date = pd.to_datetime(frame["Order_Date"])
+    # Format each distinct month once instead of every row
+    codes, months = pd.factorize(order_date.dt.year * 100 + order_date.dt.month)
+    labels = np.array([f"{m // 100:04d}-{m % 100:02d}" for m in months], dtype=object)
+    frame = pd.DataFrame({
+        "Year_Month": labels[codes],
+        "Year": order_date.dt.year.astype("int64"),
+        **{key: frame[key].astype(object).fillna("")
+           for key in ["Category", "Region", "Segment", "Product_Name", "State"]},
+        "Sales": pd.to_numeric(frame["Sales"]).astype("float64"),
+        "Profit": pd.to_numeric(frame["Profit"]).astype("float64"),
+        "Quantity": pd.to_numeric(frame["Quantity"]).astype("int64"),
+        "Order_Lines": 1,
+    })
+    return {table: frame.groupby(keys)[MEASURES].sum()
+            for table, keys in ROLLUPS.items()}
+
+
+def fetch_previous(cursor, row_ids):
+    """Current values of rows that are about to be overwritten by an upsert"""
+    placeholders = ", ".join(["%s"] * len(row_ids))
+    cursor.execute(f"SELECT {', '.join(SOURCE_COLUMNS)} FROM sales "
+                   f"WHERE Row_ID IN ({placeholders})", [int(i) for i in row_ids])
+    return pd.DataFrame(cursor.fetchall(), columns=SOURCE_COLUMNS)
+
+
+def apply_batch(cursor, frame, previous=None):
+    """Add a batch's contribution to the rollups (minus the rows it replaced)"""
+    deltas = contributions(frame)
+    if previous is not None and len(previous):
+        removed = contributions(previous)
+        deltas = {table: delta.sub(removed[table], fill_value=0)
+                  for table, delta in deltas.items()}
+
+    for table, delta in deltas.items():
+        delta = delta[(delta != 0).any(axis=1)]
+        if delta.empty:
+            continue
+        delta = delta.reset_index()
+        delta[["Quantity", "Order_Lines"]] = delta[["Quantity", "Order_Lines"]].astype("int64")
+        delta[["Sales", "Profit"]] = delta[["Sales", "Profit"]].round(4)
+        columns = list(delta.columns)
+        primary_key = [key for key in ROLLUPS[table] if key != "Year"]
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"{database.backend().upsert(primary_key, add=MEASURES)}",
+            list(zip(*[delta[c].astype(object).tolist() for c in columns])),
+        )
+        # Only buckets that lost rows can become empty; delete those by primary key
+        emptied = delta.loc[delta["Order_Lines"] < 0, primary_key]
+        if len(emptied):
+            cursor.executemany(
+                f"DELETE FROM {table} WHERE "
+                f"{' AND '.join(f'{key} = %s' for key in primary_key)} AND Order_Lines <= 0",
+                list(zip(*[emptied[c].astype(object).tolist() for c in primary_key])),
+            )
+
+
+def clear(cursor):
+    for table in ROLLUPS:
+        cursor.execute(f"DELETE FROM {table}")
+
+
+def rebuild(db):
+    """Recompute every rollup from scratch (repair / first-time backfill)"""
+    with db.cursor() as cursor:
+        clear(cursor)
+        for table, keys in ROLLUPS.items():
+            columns = keys + MEASURES
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) {recompute_sql(table)}")
+    db.commit()
+
+
+def backfill(db):
+    """
+    Rebuild the rollups if they are empty while sales is not (rollup tables
+    created on a database loaded before they existed); returns True if rebuilt.
+    """
+    with db.cursor() as cursor:
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM sales)")
+        (has_sales,) = cursor.fetchone()
+        empty = []
+        for table in ROLLUPS:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table})")
+            if not cursor.fetchone()[0]:
+                empty.append(table)
+    if has_sales and empty:
+        rebuild(db)
+        return True
+    return False
+
+
+def check(db):
+    """Compare each rollup with a full recompute; returns {table: mismatched buckets}"""
+    mismatches = {}
+    for table, keys in ROLLUPS.items():
+        columns = keys + MEASURES
+        with db.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            stored = pd.DataFrame(cursor.fetchall(), columns=columns)
+            cursor.execute(recompute_sql(table))
+            expected = pd.DataFrame(cursor.fetchall(), columns=columns)
+
+        merged = stored.merge(expected, on=keys, how="outer",
+                              suffixes=("_rollup", "_sales"), indicator=True)
+        bad = merged["_merge"] != "both"
+        for measure in MEASURES:
+            left = pd.to_numeric(merged[f"{measure}_rollup"]).astype("float64")
+            right = pd.to_numeric(merged[f"{measure}_sales"]).astype("float64")
+            bad |= (left - right).abs() > 1e-4
+        mismatches[table] = int(bad.sum())
+    return mismatches
@@ -0,0 +1,165 @@
+"""
+Central pandas dtype map for the sales data, derived from schema.sql.
+
+Column types come from the CREATE TABLE sales statement:
+- INT -> int32, BIGINT UNSIGNED -> uint64
+- DECIMAL(p, s) -> float64 (float32 would turn e.g. 0.2 into 0.2000000030)
+- DATE -> datetime64
+- VARCHAR -> category for the low-cardinality columns in CATEGORY_COLUMNS,
+  plain strings otherwise
+
+Both naming styles are accepted: CSV headers ("Sub-Category") and table
+columns ("Sub_Category"). Run this file to print the memory footprint of the
+raw dataset read with default dtypes vs. with this map.
+"""
+
+import pandas as pd
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BASE_DIR, RAW_DATA_FILE
+
+SCHEMA_FILE = os.path.join(BASE_DIR, "schema.sql")
+RAW_DATE_FORMAT = "%m/%d/%Y"
+
+# Dimensions with a few to a few hundred distinct values
+CATEGORY_COLUMNS = ["Ship_Mode", "Segment", "Country", "City", "State",
+                    "Region", "Category", "Sub_Category"]
+
+# Exceptions to the SQL type: the source file stores postal codes as numbers
+OVERRIDES = {"Postal_Code": "int64"}
+
+_COLUMN = re.compile(r"^\s*(\w+)\s+([A-Z]+)(?:\((\d+)(?:,\s*(\d+))?\))?\s*(UNSIGNED)?", re.M)
+
+
+def table_column(name):
+    """'Sub-Category' / 'Row ID' -> 'Sub_Category' / 'Row_ID'"""
+    return re.sub(r"[ -]", "_", name)
+
+
+def parse_schema(path=SCHEMA_FILE, table="sales"):
+    """{column: (sql type, precision, scale, unsigned)} from the CREATE TABLE statement"""
+    with open(path) as f:
+        sql = f.read()
+    match = re.search(rf"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?`?{table}`?\s*\((.*?)\n\)",
+                      sql, re.S | re.I)
+    if match is None:
+        raise ValueError(f"{path}: no CREATE TABLE {table} (...) statement found "
+                         f"(its closing parenthesis must start a line); cannot derive the column dtypes")
+    body = match.group(1)
+    columns = {}
+    for name, sql_type, precision, scale, unsigned in _COLUMN.findall(body):
+        if sql_type in ("INDEX", "KEY", "PRIMARY", "UNIQUE"):
+            continue
+        columns[name] = (sql_type, int(precision or 0), int(scale or 0), bool(unsigned))
+    if not columns:
+        raise ValueError(f"{path}: no column definitions found in CREATE TABLE {table}")
+    return columns
+
+
+def _pandas_dtype(name, sql_type, precision, unsigned):
+    if name in OVERRIDES:
+        return OVERRIDES[name]
+    if sql_type == "INT":
+        return "int32"
+    if sql_type == "BIGINT":
+        return "uint64" if unsigned else "int64"
+    if sql_type == "DECIMAL":
+        return "float64"
+    if sql_type in ("DATE", "DATETIME"):
+        return "datetime64[ns]"
+    return "category" if name in CATEGORY_COLUMNS else "object"
+
+
+SCHEMA = parse_schema()
+DTYPES = {name: _pandas_dtype(name, sql_type, precision, unsigned)
+          for name, (sql_type, precision, _, unsigned) in SCHEMA.items()}
+# Decimal places per DECIMAL column (hashing rounds to these)
+SCALES = {name: scale for name, (sql_type, _, scale, _) in SCHEMA.items() if sql_type == "DECIMAL"}
+
+
+def dtype_of(column):
+    return DTYPES.get(table_column(column))
+
+
+def scale_of(column):
+    return SCALES.get(table_column(column))
+
+
+def csv_read_options(path, date_format=RAW_DATE_FORMAT):
+    """read_csv keyword arguments for a CSV file: categories and parsed dates"""
+    columns = pd.read_csv(path, encoding="latin-1", nrows=0).columns
+    return {
+        "dtype": {c: "category" for c in columns if dtype_of(c) == "category"},
+        "parse_dates": [c for c in columns if dtype_of(c) == "datetime64[ns]"],
+        "date_format": date_format,
+    }
+
+
+def apply(df):
+    """
+    Convert every known column to its mapped dtype.
+
+    Integer downcasts are skipped while a column still has missing values
+    (before cleaning drops them); DECIMAL values from the database arrive as
+    Decimal objects and become floats.
+    """
+    converted = {}
+    for column in df.columns:
+        dtype = dtype_of(column)
+        series = df[column]
+        if dtype is None or series.dtype == dtype:
+            continue
+        if dtype == "category":
+            converted[column] = series.astype("category")
+        elif dtype == "datetime64[ns]":
+            converted[column] = pd.to_datetime(series)
+        elif dtype.startswith(("int", "uint")):
+            if not series.isna().any():
+                converted[column] = pd.to_numeric(series).astype(dtype)
+        else:
+            converted[column] = pd.to_numeric(series).astype(dtype)
+    return df.assign(**converted) if converted else df
+
+
+def footprint_mb(df):
+    return df.memory_usage(deep=True, index=False) / 2**20
+
+
+def memory_report(path=RAW_DATA_FILE):
+    """
+    Print per-column memory of the raw data read with default vs. mapped dtypes.
+
+    path is resolved like RAW_DATA_FILE: a file, a directory of CSVs or a glob
+    (the files are combined).
+    """
+    from scripts.cleaning_analysis import input_files
+    from scripts.partitioned_store import concat_frames
+    files = input_files(path)
+    if not files:
+        raise FileNotFoundError(f"No CSV files for {path}")
+    before = pd.concat([pd.read_csv(file, encoding="latin-1") for file in files],
+                       ignore_index=True).dropna()
+    after = apply(concat_frames([pd.read_csv(file, encoding="latin-1", **csv_read_options(file))
+                                 for file in files]).dropna())
+
+    report = pd.DataFrame({
+        "dtype before": before.dtypes.astype(str),
+        "MB before": footprint_mb(before),
+        "dtype after": after.dtypes.astype(str),
+        "MB after": footprint_mb(after),
+    })
+    print("="*60)
+    print(f"MEMORY FOOTPRINT - {os.path.basename(path)} ({len(files)} file(s), {len(after):,} rows)")
+    print("="*60)
+    print(report.round(2).to_string())
+    total_before, total_after = report["MB before"].sum(), report["MB after"].sum()
+    print(f"\nTotal: {total_before:.2f} MB -> {total_after:.2f} MB "
+          f"({total_before / total_after:.1f}x smaller)")
+    return report
+
+
+if __name__ == "__main__":
+    memory_report(sys.argv[1] if len(sys.argv) > 1 else RAW_DATA_FILE)
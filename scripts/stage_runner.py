@@ -0,0 +1,70 @@
+"""
+Minimal DAG runner for the pipeline stages.
+
+A stage is a plain function plus the names of the stages it depends on. It is
+called with its dependencies' return values as keyword arguments, so data
+(e.g. the cleaned DataFrame) is handed over in memory. Stages whose
+dependencies have finished run concurrently in a thread pool.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import metrics
+
+
+def run_stages(stages, max_workers=2):
+    """
+    Run {name: (function, [dependency names])} in dependency order.
+
+    Returns (ok, results). A failing stage marks every stage that depends on it
+    as skipped; independent stages still run to completion.
+    """
+    results = {}
+    failed = set()
+    pending = dict(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, (function, deps) in list(pending.items()):
+                    if any(dep in failed for dep in deps):
+                        print(f"Skipping stage '{name}': dependency failed")
+                        failed.add(name)
+                    elif all(dep in results for dep in deps):
+                        kwargs = {dep: results[dep] for dep in deps}
+                        running[pool.submit(_timed, name, function, kwargs)] = name
+                    else:
+                        continue
+                    del pending[name]
+                    progressed = True
+
+            if not running:
+                # Remaining stages depend on unknown stages (or a cycle)
+                for name in pending:
+                    print(f"Stage '{name}' has unresolved dependencies")
+                    failed.add(name)
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    print(f"Error in stage '{name}': {type(e).__name__}: {e}")
+                    failed.add(name)
+
+    return not failed, results
+
+
+def _timed(name, function, kwargs):
+    with metrics.stage(name) as record:
+        result = function(**kwargs)
+    print(f"[{name}] finished in {record['wall_s']:.2f}s")
+    return result
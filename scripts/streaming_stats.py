@@ -0,0 +1,145 @@
+"""
+One-pass, mergeable accumulators for numeric columns.
+
+RunningMoments keeps count, mean, co-moments (Welford / Chan et al. batch
+update), min and max for several columns at once, so a correlation matrix and
+describe()-style summary can be built from batches without holding the data.
+QuantileSketch approximates quantiles with logarithmic buckets (DDSketch):
+every reported quantile is within `accuracy` relative error of the true
+value, and memory depends on the value range, not the row count. Both can be
+merged, e.g. per-partition accumulators into one.
+"""
+
+import pandas as pd
+import numpy as np
+
+DESCRIBE_PERCENTILES = [0.25, 0.5, 0.75]
+
+
+class RunningMoments:
+    """Count, mean, covariance, min and max of k columns, updated batch by batch"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))  # sum of (x - mean)(y - mean)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def _combine(self, count, mean, comoment, minimum, maximum):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment += comoment + np.outer(delta, delta) * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = np.minimum(self.min, minimum)
+        self.max = np.maximum(self.max, maximum)
+
+    def update(self, values):
+        """Add a (rows x k) float array; rows with a missing value are skipped"""
+        values = values[~np.isnan(values).any(axis=1)]
+        if len(values):
+            mean = values.mean(axis=0)
+            centered = values - mean
+            self._combine(len(values), mean, centered.T @ centered,
+                          values.min(axis=0), values.max(axis=0))
+
+    def merge(self, other):
+        self._combine(other.count, other.mean, other.comoment, other.min, other.max)
+
+    def std(self):
+        return np.sqrt(np.diag(self.comoment) / (self.count - 1))
+
+    def corr(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        return pd.DataFrame(self.comoment / np.outer(scale, scale),
+                            index=self.columns, columns=self.columns)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative error <= accuracy (DDSketch-style buckets)"""
+
+    def __init__(self, accuracy=0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = np.log(self.gamma)
+        self.positive = {}  # bucket index -> count, for values > 0
+        self.negative = {}  # bucket index of -value -> count, for values < 0
+        self.zero = 0
+        self.count = 0
+
+    def _add(self, store, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self.log_gamma).astype("int64"),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.zero += int((values == 0).sum())
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+
+    def merge(self, other):
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+    def _value(self, key):
+        """Bucket representative: within the relative error of every value in the bucket"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return np.nan
+
+
+class ColumnSummary:
+    """RunningMoments plus one QuantileSketch per column -> describe() / corr()"""
+
+    def __init__(self, columns, accuracy=0.01):
+        self.moments = RunningMoments(columns)
+        self.sketches = [QuantileSketch(accuracy) for _ in columns]
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        self.moments.update(values)
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(values[:, i])
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        for mine, theirs in zip(self.sketches, other.sketches):
+            mine.merge(theirs)
+
+    def corr(self):
+        return self.moments.corr()
+
+    def describe(self):
+        """Same layout as DataFrame.describe(); percentiles are approximate"""
+        m = self.moments
+        rows = {"count": np.full(len(m.columns), float(m.count)), "mean": m.mean,
+                "std": m.std(), "min": m.min}
+        for p in DESCRIBE_PERCENTILES:
+            # Clamp to the exact extremes so the approximation never leaves the data range
+            rows[f"{p:.0%}"] = np.clip([s.quantile(p) for s in self.sketches], m.min, m.max)
+        rows["max"] = m.max
+        return pd.DataFrame(rows, index=m.columns).T
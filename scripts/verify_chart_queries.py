@@ -0,0 +1,62 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import database, schema_dtypes
+from scripts.chart_queries import fetch_aggregates, compute_aggregates
+
+
+def compare(sql_result, pandas_result):
+    """True if both results have the same keys/order and (float-)equal measures"""
+    if sql_result.shape != pandas_result.shape:
+        return False
+    if list(sql_result.columns) != list(pandas_result.columns):
+        return False
+    for column in sql_result.columns:
+        left, right = sql_result[column].to_numpy(), pandas_result[column].to_numpy()
+        if left.dtype.kind == "f":
+            if not np.allclose(left, right, rtol=1e-9, atol=1e-6, equal_nan=True):
+                return False
+        elif not (left == right).all():
+            return False
+    return True
+
+
+def main(argv=None):
+    """Compare SQL, rollup and pandas chart aggregates; returns the exit code"""
+    with database.connection() as db:
+        sql_aggregates = fetch_aggregates(db)
+        rollup_aggregates = fetch_aggregates(db, use_rollup=True)
+        with db.cursor() as cursor:
+            cursor.execute("SELECT * FROM sales")
+            df = schema_dtypes.apply(pd.DataFrame(cursor.fetchall(), columns=cursor.column_names))
+    pandas_aggregates = compute_aggregates(df)
+
+    print("="*60)
+    print("DATA VERIFICATION - CHART AGGREGATES (SQL / ROLLUP vs PANDAS)")
+    print("="*60)
+
+    failed = []
+    for name, pandas_result in pandas_aggregates.items():
+        sql_ok = compare(sql_aggregates[name], pandas_result)
+        rollup_ok = compare(rollup_aggregates[name], pandas_result)
+        print(f"{name:<22} {len(pandas_result):>4} rows   "
+              f"sql: {'OK' if sql_ok else 'MISMATCH'}   rollup: {'OK' if rollup_ok else 'MISMATCH'}")
+        if not (sql_ok and rollup_ok):
+            failed.append(name)
+
+    print("\n" + "="*60)
+    if failed:
+        print(f"CONCLUSION: {len(failed)} aggregate(s) differ: {', '.join(failed)}")
+    else:
+        print("CONCLUSION: SQL pushdown and rollups match the pandas computation")
+    print("="*60)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,51 +1,105 @@
 import pandas as pd
-import mysql.connector
+import numpy as np
 import sys
 import os
 
 # Add parent directory to path to import config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import DB_CONFIG
-
-# Connect to database
-db = mysql.connector.connect(**DB_CONFIG)
-
-# Load data
-df = pd.read_sql("SELECT * FROM sales;", db)
-db.close()
-
-print("="*60)
-print("DATA VERIFICATION - CORRELATION HEATMAP")
-print("="*60)
-
-# Show sample data
-print("\nSample Data (First 10 rows):")
-print(df[['Sales', 'Profit', 'Quantity', 'Discount']].head(10).to_string())
-
-# Calculate correlation
-print("\n" + "="*60)
-print("CORRELATION MATRIX:")
-print("="*60)
-corr_matrix = df[['Sales', 'Profit', 'Quantity', 'Discount']].corr()
-print(corr_matrix.round(3).to_string())
-
-# Statistics
-print("\n" + "="*60)
-print("STATISTICAL SUMMARY:")
-print("="*60)
-print(df[['Sales', 'Profit', 'Quantity', 'Discount']].describe().to_string())
-
-# Interpretation
-print("\n" + "="*60)
-print("INTERPRETATION:")
-print("="*60)
-print(f"1. Sales vs Profit:   {corr_matrix.loc['Sales', 'Profit']:.3f} (Positive correlation)")
-print(f"2. Sales vs Quantity: {corr_matrix.loc['Sales', 'Quantity']:.3f} (Weak positive)")
-print(f"3. Sales vs Discount: {corr_matrix.loc['Sales', 'Discount']:.3f} (Almost no correlation)")
-print(f"4. Profit vs Quantity: {corr_matrix.loc['Profit', 'Quantity']:.3f} (Very weak)")
-print(f"5. Profit vs Discount: {corr_matrix.loc['Profit', 'Discount']:.3f} (Negative correlation)")
-print(f"6. Quantity vs Discount: {corr_matrix.loc['Quantity', 'Discount']:.3f} (Almost no correlation)")
-
-print("\n" + "="*60)
-print("CONCLUSION: Chart is CORRECT and matches data")
-print("="*60)
+from scripts import query_cache, schema_dtypes
+from scripts.streaming_stats import ColumnSummary
+
+COLUMNS = ['Sales', 'Profit', 'Quantity', 'Discount']
+BATCH_SIZE = 10000
+SELECT_SQL = f"SELECT {', '.join(COLUMNS)} FROM sales"
+
+
+def stream_summary(db):
+    """
+    Streaming: only the four columns, unbuffered cursor, fixed-size batches,
+    one-pass accumulators -> memory does not grow with the table
+    """
+    stats = ColumnSummary(COLUMNS)
+    sample = None
+    with db.cursor(buffered=False) as cursor:
+        cursor.execute(SELECT_SQL)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            if sample is None:
+                sample = schema_dtypes.apply(pd.DataFrame(rows[:10], columns=COLUMNS))
+            stats.update(np.array(rows, dtype="float64"))
+    return sample, stats
+
+
+def main(argv=None):
+    """Correlation matrix and summary of the sales measures (--exact: in pandas)"""
+    exact = "--exact" in (sys.argv[1:] if argv is None else argv)
+
+    # Results are reused from the query cache while the sales table is unchanged
+    with query_cache.connection() as db:
+        if exact:
+            # Whole table in memory, exact percentiles
+            with db.cursor() as cursor:
+                cursor.execute(SELECT_SQL)
+                df = schema_dtypes.apply(pd.DataFrame(cursor.fetchall(), columns=COLUMNS))
+            sample = df.head(10) if len(df) else None
+            if sample is not None:
+                corr_matrix = df.corr()
+                summary = df.describe()
+        else:
+            # Only the accumulated summary is cached, never the streamed rows
+            sample, stats = db.memoize(SELECT_SQL + " -- streamed summary", stream_summary)
+            if sample is not None:
+                corr_matrix = stats.corr()
+                summary = stats.describe()
+        cache_summary = db.summary()
+
+    print("="*60)
+    print("DATA VERIFICATION - CORRELATION HEATMAP")
+    print("="*60)
+
+    if sample is None:
+        print("\nThe sales table has no rows: nothing to verify (run the load first)")
+        print(cache_summary)
+        return 1
+
+    # Show sample data
+    print("\nSample Data (First 10 rows):")
+    print(sample.to_string())
+
+    # Calculate correlation
+    print("\n" + "="*60)
+    print("CORRELATION MATRIX:")
+    print("="*60)
+    print(corr_matrix.round(3).to_string())
+
+    # Statistics
+    print("\n" + "="*60)
+    print("STATISTICAL SUMMARY:")
+    print("="*60)
+    print(summary.to_string())
+    if not exact:
+        print("(percentiles approximate, within 1% relative error; use --exact for exact values)")
+    print(cache_summary)
+
+    # Interpretation
+    print("\n" + "="*60)
+    print("INTERPRETATION:")
+    print("="*60)
+    print(f"1. Sales vs Profit:   {corr_matrix.loc['Sales', 'Profit']:.3f} (Positive correlation)")
+    print(f"2. Sales vs Quantity: {corr_matrix.loc['Sales', 'Quantity']:.3f} (Weak positive)")
+    print(f"3. Sales vs Discount: {corr_matrix.loc['Sales', 'Discount']:.3f} (Almost no correlation)")
+    print(f"4. Profit vs Quantity: {corr_matrix.loc['Profit', 'Quantity']:.3f} (Very weak)")
+    print(f"5. Profit vs Discount: {corr_matrix.loc['Profit', 'Discount']:.3f} (Negative correlation)")
+    print(f"6. Quantity vs Discount: {corr_matrix.loc['Quantity', 'Discount']:.3f} (Almost no correlation)")
+
+    print("\n" + "="*60)
+    print("CONCLUSION: Chart is CORRECT and matches data")
+    print("="*60)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import subprocess
+import argparse
+import tempfile
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BASE_DIR
+
+TABLES = ["sales", "rollup_monthly", "rollup_product", "rollup_state"]
+
+
+def run_main(arguments, env):
+    """main.py in a subprocess with its own settings; returns the exit code"""
+    completed = subprocess.run([sys.executable, "main.py"] + arguments, cwd=BASE_DIR, env=env,
+                               capture_output=True, text=True)
+    return completed.returncode
+
+
+def table_counts(path):
+    with sqlite3.connect(path) as db:
+        return {table: db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+
+def main(argv=None):
+    """
+    A full-reload run whose cleaning fails must leave the stored data intact.
+
+    Loads a slice of the raw data into a scratch SQLite database, then runs
+    the pipeline (both PIPELINE_MODEs) against a raw file that does not exist
+    and checks that sales and the rollups kept their rows. Returns the exit code.
+    """
+    parser = argparse.ArgumentParser(description="Check that a failed clean does not empty the tables")
+    parser.add_argument("--rows", type=int, default=2000, help="raw rows to load first")
+    args = parser.parse_args(argv)
+    from scripts.cleaning_analysis import input_files
+
+    print("="*60)
+    print("DATA VERIFICATION - FAILED CLEAN KEEPS THE LOADED DATA")
+    print("="*60)
+
+    failed = []
+    with tempfile.TemporaryDirectory() as directory:
+        raw = os.path.join(directory, "raw.csv")
+        with open(input_files()[0], encoding="latin-1") as source, \
+                open(raw, "w", encoding="latin-1") as target:
+            for i, line in enumerate(source):
+                if i > args.rows:
+                    break
+                target.write(line)
+
+        database = os.path.join(directory, "output", "verify.sqlite")
+        env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=database, RAW_DATA_FILE=raw,
+                   OUTPUT_DIR=os.path.join(directory, "output"), LOAD_STRATEGY="full",
+                   CLEAN_CHUNK_SIZE="0", PIPELINE_MODE="sequential")
+        if run_main(["clean"], env) or run_main(["load"], env):
+            print("\nSetup failed: could not clean and load the sample rows")
+            return 1
+        before = table_counts(database)
+        print(f"\nLoaded: {', '.join(f'{t} {n}' for t, n in before.items())}")
+
+        missing = dict(env, RAW_DATA_FILE=os.path.join(directory, "missing.csv"))
+        for mode in ("sequential", "pipelined"):
+            code = run_main([], dict(missing, PIPELINE_MODE=mode))
+            after = table_counts(database)
+            stale = run_main(["verify", "rollups"], env)
+            ok = code != 0 and after == before and stale == 0
+            print(f"{mode:<11} exit {code}, {'tables unchanged' if after == before else f'tables now {after}'}"
+                  f", rollups {'consistent' if stale == 0 else 'STALE'}   {'OK' if ok else 'FAILED'}")
+            if not ok:
+                failed.append(mode)
+
+    print("\n" + "="*60)
+    if failed:
+        print(f"CONCLUSION: a failed clean changed the stored data ({', '.join(failed)})")
+    else:
+        print("CONCLUSION: a failed clean leaves sales and the rollups untouched")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts import rollups, database, query_cache
+
+
+def main(argv=None):
+    """Check (or --rebuild) the rollup tables; returns the exit code"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    print("="*60)
+    print("DATA VERIFICATION - ROLLUP TABLES vs FULL RECOMPUTE")
+    print("="*60)
+
+    with database.connection() as db:
+        if "--rebuild" in argv:
+            print("\nRebuilding rollups from the sales table...")
+            rollups.rebuild(db)
+            query_cache.invalidate()  # cached chart results may come from the stale rollups
+
+        mismatches = rollups.check(db)
+
+    for table, bad in mismatches.items():
+        print(f"{table:<18} {'OK' if bad == 0 else f'{bad} mismatched bucket(s)'}")
+
+    print("\n" + "="*60)
+    if any(mismatches.values()):
+        print("CONCLUSION: Rollups are STALE (run with --rebuild to repair)")
+    else:
+        print("CONCLUSION: Rollups match the sales table")
+    print("="*60)
+
+    return 1 if any(mismatches.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
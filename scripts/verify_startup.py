@@ -0,0 +1,85 @@
+import subprocess
+import statistics
+import argparse
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BASE_DIR
+
+HEAVY = ["pandas", "numpy", "matplotlib", "seaborn", "mysql"]
+
+# command -> (python arguments, import budget in ms, top-level packages that must not load)
+BUDGETS = {
+    "main.py --help": (["main.py", "--help"], 100, HEAVY),
+    "main.py verify (imports)": (["-c", "import main, scripts.verify_correlation, scripts.verify_rollups, "
+                                        "scripts.verify_chart_queries, scripts.verify_topn"],
+                                 1000, ["matplotlib", "seaborn"]),
+}
+
+
+def measure(arguments):
+    """
+    Total import time in ms, the top-level packages imported (from python -X
+    importtime) and the error if the command failed: its exit code and last
+    stderr line, or None
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime"] + arguments, cwd=BASE_DIR,
+                               capture_output=True, text=True)
+    total_us = 0
+    packages = set()
+    errors = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        if "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        packages.add(name.strip().split(".")[0])
+    error = None
+    if completed.returncode != 0:
+        error = f"exit code {completed.returncode}" + (f": {errors[-1]}" if errors else "")
+    return total_us / 1000, packages, error
+
+
+def main(argv=None):
+    """Check each command's import time against its budget; returns the exit code"""
+    parser = argparse.ArgumentParser(description="Measure start-up import time against the budget")
+    parser.add_argument("--runs", type=int, default=3, help="runs per command (median is used)")
+    args = parser.parse_args(argv)
+
+    print("="*60)
+    print("START-UP CHECK - IMPORT TIME BUDGET")
+    print("="*60)
+
+    failed = []
+    for command, (arguments, budget_ms, forbidden) in BUDGETS.items():
+        runs = [measure(arguments) for _ in range(args.runs)]
+        import_ms = statistics.median(ms for ms, _, _ in runs)
+        loaded = sorted(set(forbidden) & runs[0][1])
+        # A command that fails may stop before its imports: its time proves nothing
+        error = next((error for _, _, error in runs if error), None)
+        ok = import_ms <= budget_ms and not loaded and error is None
+        status = "FAILED" if error else "OK" if ok else "OVER BUDGET"
+        print(f"{command:<26} {import_ms:>7.1f} ms (budget {budget_ms} ms)   {status}")
+        if loaded:
+            print(f"{'':<26} imports {', '.join(loaded)}")
+        if error:
+            print(f"{'':<26} {error}")
+        if not ok:
+            failed.append(command)
+
+    print("\n" + "="*60)
+    if failed:
+        print(f"CONCLUSION: {len(failed)} command(s) failed or over budget: {', '.join(failed)}")
+    else:
+        print("CONCLUSION: All commands start within their import budget")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import pandas as pd
+import argparse
+import glob
+import sys
+import os
+
+# Add parent directory to path to import config
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import RAW_DATA_FILE, TOPN_EPSILON, BASE_DIR
+from scripts.heavy_hitters import HeavyHitters
+
+# (group by, measure) pairs that the EDA and charts rank
+RANKINGS = [("Product Name", "Sales"), ("Product Name", "Quantity"), ("State", "Sales")]
+TOP = 10
+
+
+def default_file():
+    """Largest generated benchmark file, else the raw dataset"""
+    files = glob.glob(os.path.join(BASE_DIR, "data", "synthetic", "*.csv"))
+    return max(files, key=os.path.getsize) if files else RAW_DATA_FILE
+
+
+def main(argv=None):
+    """Exact vs approximate top-N on a CSV file; returns the exit code"""
+    parser = argparse.ArgumentParser(description="Compare approximate top-N with the exact result")
+    parser.add_argument("file", nargs="?", default=None, help="CSV file (default: largest benchmark file)")
+    parser.add_argument("--epsilon", type=float, default=TOPN_EPSILON)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    path = args.file or default_file()
+
+    # One pass: exact per-chunk partial sums (merged) alongside one sketch per chunk (merged)
+    columns = sorted({c for pair in RANKINGS for c in pair})
+    exact = {pair: [] for pair in RANKINGS}
+    sketches = {pair: HeavyHitters(args.epsilon) for pair in RANKINGS}
+    rows = 0
+    for chunk in pd.read_csv(path, encoding="latin-1", usecols=columns, chunksize=args.chunk_size):
+        chunk = chunk.dropna()
+        rows += len(chunk)
+        for by, value in RANKINGS:
+            exact[(by, value)].append(chunk.groupby(by)[value].sum())
+            sketches[(by, value)].merge(HeavyHitters(args.epsilon).update(chunk[by], chunk[value]))
+
+    print("="*60)
+    print("DATA VERIFICATION - APPROXIMATE TOP-N (HEAVY HITTERS)")
+    print("="*60)
+    print(f"File: {os.path.relpath(path, BASE_DIR)} ({rows:,} rows), epsilon = {args.epsilon}")
+
+    failed = []
+    for by, value in RANKINGS:
+        totals = pd.concat(exact[(by, value)]).groupby(level=0).sum()
+        totals = totals.rename("total").rename_axis("key").reset_index() \
+            .sort_values(["total", "key"], ascending=[False, True], kind="mergesort")
+        truth = pd.Series(totals["total"].to_numpy(), index=totals["key"].to_numpy())
+        sketch = sketches[(by, value)]
+        estimate = sketch.top(TOP)
+
+        recall = len(set(estimate.index) & set(truth.index[:TOP])) / TOP
+        same_order = list(estimate.index) == list(truth.index[:TOP])
+        error = (estimate - truth.reindex(estimate.index)).abs().max()
+        within_bound = error <= sketch.bound + 1e-6 * sketch.total
+
+        print(f"\nTop {TOP} {by} by {value}:")
+        print(f"  recall {recall:.0%}, same order: {'yes' if same_order else 'no'}")
+        print(f"  max error {error:,.2f} (bound {sketch.bound:,.2f}) "
+              f"{'OK' if within_bound else 'EXCEEDED'}")
+        print(f"  counters kept {len(sketch.counts):,} of {len(truth):,} distinct values")
+        if not within_bound:
+            failed.append(f"{by} by {value}")
+
+    print("\n" + "="*60)
+    if failed:
+        print(f"CONCLUSION: error bound EXCEEDED for {', '.join(failed)}")
+    else:
+        print("CONCLUSION: Approximate top-N is within its error bound")
+    print("="*60)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())